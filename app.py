@@ -1,24 +1,71 @@
-import uvicorn
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from database.configs.database import (
+    DB_WARMUP_CONNECTIONS,
+    get_async_engine,
+    init_engines,
+    warm_up,
+)
 from routes.after_day import router as after_day_router
+from routes.dashboard import router as dashboard_router
 from routes.means import router as means_router
+from routes.metrics import router as metrics_router
 from routes.reading import router as reading_router
 from routes.sun import router as sun_router
+from utils.hub import reading_hub
+from utils.ingest import ingest_buffer
+from utils.latest import latest_reading
+from utils.metrics import MetricsMiddleware
+from utils.shared import follow, seed, shared_ring
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines e pool nascem aqui, não na importação do app
+    init_engines()
+    reading_hub.bind(asyncio.get_running_loop())
+    if shared_ring is not None:
+        shared_ring.open()
+    try:
+        await warm_up(DB_WARMUP_CONNECTIONS)
+        latest_reading.load()
+        if shared_ring is not None:
+            seed()
+    except Exception as e:
+        # Sem banco na subida: a leitura será carregada no primeiro acesso
+        print(f"Could not preload latest reading: {e}")
+    follower = asyncio.create_task(follow()) if shared_ring is not None else None
+    if ingest_buffer is not None:
+        ingest_buffer.start()
+    yield
+    if ingest_buffer is not None:
+        ingest_buffer.stop()
+    if follower is not None:
+        follower.cancel()
+        shared_ring.close()
+    await get_async_engine().dispose()
+
 
 app = FastAPI(
     title="IOT Meteorology API and Dashboard",
     description="API for accessing meteorological data and insights",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 templates = Jinja2Templates(directory="templates")
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Comprime respostas grandes (séries, CSV); SSE fica de fora
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -26,10 +73,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Mais externo: mede a requisição inteira, inclusive compressão
+app.add_middleware(MetricsMiddleware)
+app.include_router(metrics_router)
 app.include_router(reading_router, prefix="/api")
 app.include_router(means_router, prefix="/api")
 app.include_router(sun_router, prefix="/api")
 app.include_router(after_day_router, prefix="/api")
+app.include_router(dashboard_router, prefix="/api")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -63,4 +114,13 @@ def read_download(request: Request):
 
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    import uvicorn
+
+    # Conexões SSE abertas seguram o desligamento/recarga até este limite
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        timeout_graceful_shutdown=5,
+    )
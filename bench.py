@@ -0,0 +1,262 @@
+"""Benchmark de latência e vazão das rotas da API contra um banco semeado."""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Rotas chamadas em cada rodada: (nome, método, caminho, corpo)
+ROUTES = [
+    ("readings.latest", "GET", "/api/readings/latest", None),
+    ("readings.latest.stations", "GET", "/api/readings/latest/stations", None),
+    ("readings.24h", "GET", "/api/readings/24h", None),
+    ("readings.15d", "GET", "/api/readings/15d", None),
+    ("readings.30d", "GET", "/api/readings/30d", None),
+    ("readings.30d.points", "GET", "/api/readings/30d?points=500", None),
+    ("readings.30d.columnar", "GET", "/api/readings/30d?format=columnar", None),
+    ("readings.file", "GET", "/api/readings/file", None),
+    (
+        "readings.page",
+        "GET",
+        f"/api/readings?start={date.today() - timedelta(days=180)}&limit=1000",
+        None,
+    ),
+    ("dashboard", "GET", "/api/dashboard?points=500", None),
+    ("means.stats.15d", "GET", "/api/means/stats/15d", None),
+    ("means.stats.30d", "GET", "/api/means/stats/30d", None),
+    (
+        "means.stats.periods",
+        "GET",
+        "/api/means/stats?periods=1d,7d,15d,30d,365d",
+        None,
+    ),
+    ("means.distribution.30d", "GET", "/api/means/distribution?period=30d", None),
+    ("means.eto.15d", "GET", "/api/means/evapotranspiration/15d", None),
+    ("means.eto.30d", "GET", "/api/means/evapotranspiration/30d", None),
+    (
+        "means.eto.range",
+        "GET",
+        f"/api/means/evapotranspiration?start={date.today() - timedelta(days=365)}",
+        None,
+    ),
+    ("after_day.summary", "GET", "/api/after-day/summary", None),
+    ("after_day.series", "GET", "/api/after-day/series", None),
+    ("sun.today", "GET", "/api/sun/today", None),
+    ("sun.yesterday", "GET", "/api/sun/yesterday", None),
+    ("sun.day", "GET", f"/api/sun/day?day={date.today() - timedelta(days=90)}", None),
+    (
+        "sun.range",
+        "GET",
+        f"/api/sun/range?start={date.today().year}-01-01&end={date.today().year}-12-31",
+        None,
+    ),
+    (
+        "readings.add",
+        "POST",
+        "/api/readings/",
+        {"temperature": 21.5, "humidity": 63.0},
+    ),
+    (
+        "readings.batch",
+        "POST",
+        "/api/readings/batch",
+        [{"temperature": 21.5 + i / 10, "humidity": 63.0} for i in range(50)],
+    ),
+]
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    # Pico do processo inteiro (ru_maxrss): KB no Linux, bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def prepare(years: float, reset: bool):
+    """Cria/migra as tabelas e semeia `years` anos de leituras a cada 5 minutos."""
+    from sqlalchemy import text
+
+    import manager
+    from database import migrations
+    from database.configs.database import Base, get_engine
+    from utils.stations import DEFAULT_STATION
+
+    engine = get_engine()
+    migrations.upgrade(engine, Base.metadata)
+    if reset:
+        with engine.begin() as conn:
+            for table in (
+                "readings",
+                "readings_hourly",
+                "readings_daily",
+                "readings_histogram_daily",
+            ):
+                conn.execute(text(f"DELETE FROM {table}"))
+    manager.seed(
+        argparse.Namespace(
+            days=int(years * 365),
+            interval_minutes=5,
+            seed=42,
+            station=DEFAULT_STATION,
+        )
+    )
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM readings")).scalar()
+
+
+async def _run_route(client, method, path, body, requests: int, concurrency: int):
+    latencies, errors, response_bytes = [], 0, 0
+    pending = iter(range(requests))
+    peak_before = _peak_rss_mb()
+
+    async def worker():
+        nonlocal errors, response_bytes
+        for _ in pending:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            response_bytes += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    peak_after = _peak_rss_mb()
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "avg_response_bytes": response_bytes // requests,
+        # O pico só cresce: a rota responde pelo quanto o elevou, não pelo valor
+        "process_peak_rss_mb": peak_after,
+        "peak_rss_growth_mb": round(peak_after - peak_before, 1),
+    }
+
+
+async def run_routes(args) -> list[dict]:
+    import httpx
+
+    from app import app
+    from utils.cache import response_cache
+
+    response_cache.clear()
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for name, method, path, body in ROUTES:
+                if args.routes and not any(r in name for r in args.routes):
+                    continue
+                if method != "GET" and args.read_only:
+                    continue
+                for concurrency in args.concurrency:
+                    # Aquecimento: conexões do pool, caches de processo
+                    await client.request(method, path, json=body)
+                    stats = await _run_route(
+                        client, method, path, body, args.requests, concurrency
+                    )
+                    results.append(
+                        {"route": name, "path": path, "concurrency": concurrency}
+                        | stats
+                    )
+                    print(
+                        f"{name:24} c={concurrency:<3} p50={stats['p50_ms']:>9}ms "
+                        f"p95={stats['p95_ms']:>9}ms p99={stats['p99_ms']:>9}ms "
+                        f"{stats['throughput_rps']:>8} req/s "
+                        f"errors={stats['errors']}"
+                    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency/throughput benchmark")
+    parser.add_argument(
+        "--years",
+        type=float,
+        nargs="+",
+        default=[1],
+        help="Volumes to seed, in years of 5-minute readings",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Delete readings and rollups before seeding each volume",
+    )
+    parser.add_argument(
+        "--no-seed", action="store_true", help="Benchmark the database as it is"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Per route and level")
+    parser.add_argument("--routes", nargs="*", help="Only routes whose name contains")
+    parser.add_argument("--read-only", action="store_true", help="Skip write routes")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the response cache"
+    )
+    parser.add_argument("--output", default="bench-results.json")
+    args = parser.parse_args()
+
+    if len(args.years) > 1 and not (args.reset or args.no_seed):
+        parser.error("--reset is required to benchmark more than one volume")
+    if args.no_cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+    from database.configs.database import get_engine
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": get_engine().url.get_backend_name(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "cache": not args.no_cache,
+            "read_only": args.read_only,
+        },
+        "volumes": [],
+    }
+    for years in args.years:
+        rows = None if args.no_seed else prepare(years, args.reset)
+        print(f"== {years} year(s), {rows} readings")
+        results = asyncio.run(run_routes(args))
+        report["volumes"].append({"years": years, "readings": rows, "results": results})
+
+    report["process_peak_rss_mb"] = _peak_rss_mb()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,101 @@
 import os
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from utils.metrics import instrument_engine, timed_pool
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-print(f"Connecting to database at {DATABASE_URL}")
-engine = create_engine(
-    DATABASE_URL,
-    pool_recycle=3600,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=True,
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Log de cada SQL (útil só para depuração; caro no caminho quente)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+# Conexões abertas na subida da API (0 = pool preenchido sob demanda)
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", "0"))
+
+# Os engines são criados sob demanda (lifespan da API, comandos do manager),
+# não na importação: importar o app não carrega drivers nem abre o pool.
+engine = None
+async_engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+# Driver assíncrono equivalente ao da DATABASE_URL (usado pelas rotas da API)
+_ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def _async_url(url: str):
+    url = make_url(url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=driver)
+
+
+def init_engines():
+    """Cria os engines síncrono e assíncrono (uma única vez) e liga as sessões."""
+    global engine, async_engine
+    if engine is not None:
+        return engine
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is not set")
+    url = make_url(DATABASE_URL)
+    print(f"Connecting to database at {url.render_as_string(hide_password=True)}")
+    sync_engine = create_engine(
+        url,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        echo=SQL_ECHO,
+        poolclass=timed_pool(QueuePool),
+        pool_logging_name="sync",
+    )
+    instrument_engine(sync_engine, "sync")
+    async_engine = create_async_engine(
+        os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL),
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        echo=SQL_ECHO,
+        poolclass=timed_pool(AsyncAdaptedQueuePool),
+        pool_logging_name="async",
+    )
+    instrument_engine(async_engine.sync_engine, "async")
+    SessionLocal.configure(bind=sync_engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+    engine = sync_engine
+    return engine
+
+
+def get_engine():
+    return engine if engine is not None else init_engines()
+
+
+def get_async_engine():
+    get_engine()
+    return async_engine
+
+
+async def warm_up(connections: int):
+    """Abre `connections` conexões do pool assíncrono antes do primeiro request."""
+    if connections <= 0:
+        return
+    conns = [await get_async_engine().connect() for _ in range(connections)]
+    for conn in conns:
+        await conn.exec_driver_sql("SELECT 1")
+        await conn.close()
+
 
-def get_session():
-    session = SessionLocal()
-    try:
-        yield session
-    except Exception as e:
-        print(f"Database session error: {e}")
-        session.rollback()
-        raise
-    finally:
-        session.close()
+async def get_async_session():
+    get_engine()
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        except Exception as e:
+            print(f"Database session error: {e}")
+            await session.rollback()
+            raise
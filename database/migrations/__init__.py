@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database.migrations import (
+    m0001_readings_timestamp_index,
+    m0002_readings_local_date,
+    m0003_readings_station,
+    m0004_rollups_station,
+    m0005_readings_keyset_index,
+)
+
+# Em ordem de aplicação. Cada módulo expõe VERSION, DESCRIPTION e upgrade(conn).
+MIGRATIONS = [
+    m0001_readings_timestamp_index,
+    m0002_readings_local_date,
+    m0003_readings_station,
+    m0004_rollups_station,
+    m0005_readings_keyset_index,
+]
+
+
+def _applied_versions(engine) -> set[str]:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(32) NOT NULL PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at DATETIME NOT NULL
+                )
+                """
+            )
+        )
+        versions = conn.execute(text("SELECT version FROM schema_migrations"))
+        return set(versions.scalars())
+
+
+def upgrade(engine, metadata):
+    """Cria tabelas ausentes e aplica as migrações pendentes.
+
+    Tabelas criadas agora por `create_all` já estão no formato atual das
+    entidades; as migrações detectam isso e apenas são registradas.
+    """
+    metadata.create_all(bind=engine)
+    applied = _applied_versions(engine)
+
+    for migration in MIGRATIONS:
+        if migration.VERSION in applied:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO schema_migrations (version, description, applied_at)
+                    VALUES (:version, :description, :applied_at)
+                    """
+                ),
+                {
+                    "version": migration.VERSION,
+                    "description": migration.DESCRIPTION,
+                    "applied_at": datetime.now(),
+                },
+            )
+        print(f"Migration {migration.VERSION} applied: {migration.DESCRIPTION}")
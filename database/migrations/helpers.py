@@ -0,0 +1,16 @@
+from sqlalchemy import inspect
+
+# As migrações verificam o estado atual antes de alterar o schema: tabelas
+# criadas agora por `create_all` já nascem no formato final das entidades.
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table: str, index: str) -> bool:
+    return any(i["name"] == index for i in inspect(conn).get_indexes(table))
+
+
+def primary_key(conn, table: str) -> list[str]:
+    return inspect(conn).get_pk_constraint(table)["constrained_columns"]
@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+from database.migrations.helpers import has_index
+
+VERSION = "0001"
+DESCRIPTION = "covering index on readings (timestamp, temperature, humidity)"
+
+
+def upgrade(conn):
+    if has_index(conn, "readings", "ix_readings_ts_temp_hum"):
+        return
+    conn.execute(
+        text(
+            """
+            CREATE INDEX ix_readings_ts_temp_hum
+            ON readings (timestamp, temperature, humidity)
+            """
+        )
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+from database.migrations.helpers import has_column
+
+VERSION = "0002"
+DESCRIPTION = "stored local_date column on readings for day bucketing"
+
+
+def upgrade(conn):
+    if has_column(conn, "readings", "local_date"):
+        return
+    conn.execute(
+        text(
+            """
+            ALTER TABLE readings
+                ADD COLUMN local_date DATE AS (DATE(timestamp)) STORED,
+                ADD INDEX ix_readings_local_date (local_date)
+            """
+        )
+    )
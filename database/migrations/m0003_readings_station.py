@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+from database.migrations.helpers import has_column
+
+VERSION = "0003"
+DESCRIPTION = "station_id on readings with (station_id, timestamp) index"
+
+
+def upgrade(conn):
+    if has_column(conn, "readings", "station_id"):
+        return
+    conn.execute(
+        text(
+            """
+            ALTER TABLE readings
+                ADD COLUMN station_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                ADD INDEX ix_readings_station_ts (station_id, timestamp)
+            """
+        )
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import text
+
+from database.migrations.helpers import has_column
+
+VERSION = "0004"
+DESCRIPTION = "station_id in the primary key of readings_hourly/readings_daily"
+
+
+def upgrade(conn):
+    for table, bucket in (("readings_hourly", "bucket"), ("readings_daily", "day")):
+        if has_column(conn, table, "station_id"):
+            continue
+        conn.execute(
+            text(
+                f"""
+                ALTER TABLE {table}
+                    ADD COLUMN station_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                    DROP PRIMARY KEY,
+                    ADD PRIMARY KEY (station_id, {bucket}),
+                    ADD INDEX ix_{table}_{bucket} ({bucket})
+                """
+            )
+        )
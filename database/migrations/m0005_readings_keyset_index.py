@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+from database.migrations.helpers import has_index
+
+VERSION = "0005"
+DESCRIPTION = "index on readings (timestamp, id) for keyset pagination"
+
+
+def upgrade(conn):
+    if has_index(conn, "readings", "ix_readings_ts_id"):
+        return
+    conn.execute(text("CREATE INDEX ix_readings_ts_id ON readings (timestamp, id)"))
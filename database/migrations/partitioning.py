@@ -0,0 +1,98 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+# Particionamento mensal opcional de `readings` por RANGE (TO_DAYS(timestamp)).
+# Não faz parte das migrações automáticas porque troca a chave primária para
+# (id, timestamp), exigência do MySQL para tabelas particionadas.
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _add_months(d: date, months: int) -> date:
+    for _ in range(months):
+        d = _next_month(d)
+    return d
+
+
+def _partition_defs(first: date, last: date) -> list[str]:
+    defs = []
+    month = first
+    while month <= last:
+        upper = _next_month(month)
+        defs.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))"
+        )
+        month = upper
+    defs.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return defs
+
+
+def partitions(conn) -> list[str]:
+    return list(
+        conn.execute(
+            text(
+                """
+                SELECT PARTITION_NAME
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'readings'
+                  AND PARTITION_NAME IS NOT NULL
+                ORDER BY PARTITION_ORDINAL_POSITION
+                """
+            )
+        ).scalars()
+    )
+
+
+def enable(conn, months_ahead: int = 3):
+    """Particiona `readings` por mês, do mês da leitura mais antiga em diante."""
+    oldest = conn.execute(text("SELECT MIN(timestamp) FROM readings")).scalar()
+    first = _month_start((oldest or datetime.now()).date())
+    last = _add_months(_month_start(date.today()), months_ahead)
+
+    conn.execute(
+        text("ALTER TABLE readings DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)")
+    )
+    conn.execute(
+        text(
+            "ALTER TABLE readings PARTITION BY RANGE (TO_DAYS(timestamp)) ("
+            + ", ".join(_partition_defs(first, last))
+            + ")"
+        )
+    )
+
+
+def extend(conn, months_ahead: int = 3):
+    """Cria as partições dos próximos meses, dividindo a partição `pmax`."""
+    monthly = [p for p in partitions(conn) if p != "pmax"]
+    newest = datetime.strptime(monthly[-1], "p%Y%m").date()
+    last = _add_months(_month_start(date.today()), months_ahead)
+    if newest >= last:
+        return
+    conn.execute(
+        text(
+            "ALTER TABLE readings REORGANIZE PARTITION pmax INTO ("
+            + ", ".join(_partition_defs(_next_month(newest), last))
+            + ")"
+        )
+    )
+
+
+def drop_before(conn, cutoff: date) -> list[str]:
+    """Remove as partições mensais que terminam antes de `cutoff`."""
+    dropped = [
+        name
+        for name in partitions(conn)
+        if name != "pmax"
+        and _next_month(datetime.strptime(name, "p%Y%m").date()) <= cutoff
+    ]
+    if dropped:
+        conn.execute(text(f"ALTER TABLE readings DROP PARTITION {', '.join(dropped)}"))
+    return dropped
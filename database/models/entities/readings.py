@@ -1,18 +1,47 @@
-from sqlalchemy import Column, DateTime, Double, Integer, func
+from sqlalchemy import (
+    Column,
+    Computed,
+    Date,
+    DateTime,
+    Double,
+    Index,
+    Integer,
+    String,
+    func,
+)
 
 from database.configs.database import Base
 
 
 class Readings(Base):
     __tablename__ = "readings"
+    __table_args__ = (
+        # Cobre as consultas por janela de tempo sem acessar a tabela
+        Index("ix_readings_ts_temp_hum", "timestamp", "temperature", "humidity"),
+        # Última leitura e janelas de uma estação via busca no índice
+        Index("ix_readings_station_ts", "station_id", "timestamp"),
+        # Paginação por chave em GET /api/readings (ORDER BY timestamp, id)
+        Index("ix_readings_ts_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
     timestamp = Column(DateTime, default=func.now(), nullable=False)
     temperature = Column(Double, nullable=False)
     humidity = Column(Double, nullable=False)
+    local_date = Column(Date, Computed("DATE(timestamp)", persisted=True), index=True)
+    station_id = Column(
+        String(64), nullable=False, default="default", server_default="default"
+    )
 
-    def __init__(self, temperature: float, humidity: float, timestamp: DateTime = None):
+    def __init__(
+        self,
+        temperature: float,
+        humidity: float,
+        timestamp: DateTime = None,
+        station_id: str = "default",
+    ):
         self.temperature = temperature
         self.humidity = humidity
+        self.station_id = station_id
         if timestamp:
             self.timestamp = timestamp
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer
+
+from database.configs.database import Base
+
+
+class RetentionState(Base):
+    """Linha única com o limite da compactação de `readings`.
+
+    Leituras brutas anteriores a `compacted_until` só existem nos agregados
+    horários (e, se configurado, nos arquivos Parquet).
+    """
+
+    __tablename__ = "readings_retention"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    compacted_until = Column(DateTime, nullable=False)
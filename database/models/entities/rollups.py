@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Date, DateTime, Double, Integer, String
+
+from database.configs.database import Base
+
+
+class HourlyRollup(Base):
+    __tablename__ = "readings_hourly"
+
+    station_id = Column(
+        String(64), primary_key=True, nullable=False, server_default="default"
+    )
+    bucket = Column(DateTime, primary_key=True, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Double, nullable=False, default=0)
+    temp_min = Column(Double, nullable=False)
+    temp_max = Column(Double, nullable=False)
+    hum_sum = Column(Double, nullable=False, default=0)
+    hum_min = Column(Double, nullable=False)
+    hum_max = Column(Double, nullable=False)
+
+
+class DailyRollup(Base):
+    __tablename__ = "readings_daily"
+
+    station_id = Column(
+        String(64), primary_key=True, nullable=False, server_default="default"
+    )
+    day = Column(Date, primary_key=True, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Double, nullable=False, default=0)
+    temp_min = Column(Double, nullable=False)
+    temp_max = Column(Double, nullable=False)
+    hum_sum = Column(Double, nullable=False, default=0)
+    hum_min = Column(Double, nullable=False)
+    hum_max = Column(Double, nullable=False)
+
+
+class DailyHistogram(Base):
+    """Contagem de leituras por faixa fina de valor, por dia (ver utils/histograms)."""
+
+    __tablename__ = "readings_histogram_daily"
+
+    station_id = Column(
+        String(64), primary_key=True, nullable=False, server_default="default"
+    )
+    day = Column(Date, primary_key=True, nullable=False, index=True)
+    metric = Column(String(8), primary_key=True, nullable=False)
+    bin = Column(Integer, primary_key=True, nullable=False, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,14 +1,34 @@
 import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from utils.stations import DEFAULT_STATION, STATION_PATTERN
 
 
 class ReadingSchema(BaseModel):
     temperature: float
     humidity: float
+    station_id: str = Field(DEFAULT_STATION, pattern=STATION_PATTERN)
 
 
 class ReadingSchemaResponse(BaseModel):
     temperature: float
     humidity: float
     timestamp: datetime.datetime
+    station_id: str = DEFAULT_STATION
+
+
+class ReadingBatchItemSchema(ReadingSchema):
+    timestamp: datetime.datetime | None = None
+
+
+class ReadingBatchItemResult(BaseModel):
+    index: int
+    accepted: bool
+    error: str | None = None
+
+
+class ReadingBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[ReadingBatchItemResult]
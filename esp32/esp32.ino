@@ -9,6 +9,7 @@ DHT dht(DHTPIN, DHTTYPE);
 const char *ssid = "Jaly Tôrei";
 const char *password = "admin.root";
 const char *SERVER_URL = "http://192.168.45.16:8000/api/readings/"; // Adicionada barra final
+const char *STATION_ID = "default"; // Identifica este dispositivo (letras, números, _ . -)
 
 const unsigned long INTERVAL = 5UL * 60UL * 1000UL; // 5 minutos
 unsigned long lastSend = 0;
@@ -48,7 +49,7 @@ void sendData()
     }
 
     // Melhor formatação do JSON
-    String json = "{\"temperature\":" + String(t, 1) + ",\"humidity\":" + String(h, 1) + "}";
+    String json = "{\"temperature\":" + String(t, 1) + ",\"humidity\":" + String(h, 1) + ",\"station_id\":\"" + String(STATION_ID) + "\"}";
     
     Serial.println("Enviando: " + json); // Debug
 
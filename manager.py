@@ -1,9 +1,308 @@
+import argparse
+import math
+import os
+import random
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
 from sqlalchemy import text
 
-from database.configs.database import Base, engine
+from database import migrations
+from database.configs.database import Base, SessionLocal, get_engine
+from database.migrations import partitioning
 from database.models.entities.readings import Readings  # Importe o modelo  # noqa: F401
+from database.models.entities.retention import RetentionState  # noqa: F401
+from database.models.entities.rollups import (  # noqa: F401
+    DailyHistogram,
+    DailyRollup,
+    HourlyRollup,
+)
+from utils import importer, retention, rollups
+from utils.ingest import insert_readings
+from utils.stations import DEFAULT_STATION
+
+# Orçamento de importação do app (ms) verificado por `import-time`
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1100"))
+# Módulos que o app só pode carregar sob demanda; `import-time` falha se
+# aparecerem depois de `import app`
+LAZY_MODULES = ("numpy", "pandas")
+
+# Colunas do EXPLAIN mostradas pelo comando `explain`
+EXPLAIN_COLUMNS = ("table", "partitions", "type", "key", "rows", "Extra")
+
+# Consultas representativas das rotas, usadas pelo comando `explain`
+EXPLAIN_QUERIES = {
+    "window (24h/15d/30d series)": (
+        """
+        SELECT temperature, humidity, timestamp
+        FROM readings WHERE timestamp >= :start ORDER BY timestamp ASC
+        """,
+        {"start": datetime.now() - timedelta(days=30)},
+    ),
+    "latest": (
+        "SELECT temperature, humidity, timestamp FROM readings "
+        "ORDER BY timestamp DESC LIMIT 1",
+        {},
+    ),
+    "latest per station": (
+        "SELECT temperature, humidity, timestamp FROM readings "
+        "WHERE station_id = :station ORDER BY timestamp DESC LIMIT 1",
+        {"station": DEFAULT_STATION},
+    ),
+    "daily buckets (raw part)": (
+        """
+        SELECT local_date, COUNT(*), SUM(temperature), SUM(humidity)
+        FROM readings
+        WHERE timestamp >= :start AND timestamp < :end
+        GROUP BY local_date
+        """,
+        {
+            "start": datetime.now() - timedelta(days=30),
+            "end": datetime.now() - timedelta(days=29),
+        },
+    ),
+    "export (365d)": (
+        """
+        SELECT timestamp, temperature, humidity FROM readings
+        WHERE timestamp >= :start ORDER BY timestamp ASC
+        """,
+        {"start": datetime.now() - timedelta(days=365)},
+    ),
+    "keyset page (GET /api/readings)": (
+        """
+        SELECT id, timestamp, temperature, humidity, station_id FROM readings
+        WHERE timestamp >= :start AND (timestamp > :start OR id > :after_id)
+        ORDER BY timestamp ASC, id ASC LIMIT 1001
+        """,
+        {"start": datetime.now() - timedelta(days=180), "after_id": 0},
+    ),
+}
+
+
+def migrate(args):
+    with get_engine().begin() as conn:
+        result = conn.execute(text("SELECT 1"))
+        print(result.fetchall())
+    migrations.upgrade(get_engine(), Base.metadata)
+
+
+def rebuild_rollups(args):
+    """Recria (ou preenche pela primeira vez) os agregados horário e diário."""
+    Base.metadata.create_all(bind=get_engine())
+    with get_engine().begin() as conn:
+        rollups.rebuild(conn, since=retention.watermark(conn))
+        hours = conn.execute(text("SELECT COUNT(*) FROM readings_hourly")).scalar()
+        days = conn.execute(text("SELECT COUNT(*) FROM readings_daily")).scalar()
+    print(f"Rollups rebuilt: {hours} hourly buckets, {days} daily buckets")
+
+
+def compact(args):
+    """Apaga leituras brutas fora da janela quente (ficam nos agregados)."""
+    Base.metadata.create_all(bind=get_engine())
+    result = retention.compact(get_engine(), args.hot_days, args.archive_dir)
+    if result["archive"]:
+        print(f"Archived raw readings to {result['archive']}")
+    if result["dropped"]:
+        print(f"Dropped partitions: {', '.join(result['dropped'])}")
+    print(
+        f"Compacted readings before {result['cutoff']:%Y-%m-%d %H:%M}: "
+        f"{result['deleted']} rows deleted"
+    )
+
+
+def partition(args):
+    with get_engine().begin() as conn:
+        if partitioning.partitions(conn):
+            partitioning.extend(conn, args.months_ahead)
+        else:
+            partitioning.enable(conn, args.months_ahead)
+        names = partitioning.partitions(conn)
+    print(f"readings partitions: {', '.join(names)}")
+
+
+def seed(args):
+    """Gera leituras sintéticas (ciclo diário + ruído) para testes locais."""
+    rng = random.Random(args.seed)
+    end = datetime.now().replace(second=0, microsecond=0)
+    step = timedelta(minutes=args.interval_minutes)
+    total = int(timedelta(days=args.days) / step)
+    ts = end - total * step
+
+    get_engine()
+    session = SessionLocal()
+    try:
+        batch = []
+        for _ in range(total):
+            phase = 2 * math.pi * (ts.hour + ts.minute / 60 - 9) / 24
+            temperature = 22 + 6 * math.sin(phase) + rng.gauss(0, 0.5)
+            humidity = 65 - 20 * math.sin(phase) + rng.gauss(0, 2)
+            batch.append(
+                {
+                    "timestamp": ts,
+                    "temperature": round(temperature, 1),
+                    "humidity": round(min(max(humidity, 0), 100), 1),
+                    "station_id": args.station,
+                }
+            )
+            if len(batch) >= 5000:
+                insert_readings(session, batch)
+                session.commit()
+                batch = []
+            ts += step
+        insert_readings(session, batch)
+        session.commit()
+    finally:
+        session.close()
+    print(f"Seeded {total} readings over {args.days} days for {args.station}")
+
+
+def import_readings(args):
+    """Importa um CSV no formato da exportação (backfill ou restauração)."""
+    migrations.upgrade(get_engine(), Base.metadata)
+    stats = importer.import_csv(args.path, args.station, args.batch_size)
+    for error in stats["errors"]:
+        print(f"Skipped {error}")
+    rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0
+    print(
+        f"Imported {stats['inserted']} readings in {stats['seconds']}s "
+        f"({rate:,.0f} rows/s): {stats['duplicates']} duplicates, "
+        f"{stats['compacted']} rows before the compaction watermark and "
+        f"{stats['invalid']} invalid rows skipped"
+    )
+
+
+def explain(args):
+    with get_engine().connect() as conn:
+        for name, (sql, params) in EXPLAIN_QUERIES.items():
+            print(f"== {name}")
+            for row in conn.execute(text(f"EXPLAIN {sql}"), params).mappings():
+                # MariaDB e MySQL antigos não trazem `partitions` (e variam nas demais)
+                print(
+                    "  "
+                    + " ".join(f"{c.lower()}={row.get(c)}" for c in EXPLAIN_COLUMNS)
+                )
+
+
+def _import_times(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """Roda `python -X importtime` em um processo novo; devolve (total, módulos)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total_us, modules = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabeçalho
+        cumulative_us = int(cumulative)
+        modules.append((cumulative_us / 1000, name.rstrip()))
+        if name.strip() == module:
+            total_us = cumulative_us
+    return total_us / 1000, modules
+
+
+def _eager_modules(module: str) -> list[str]:
+    """Módulos de LAZY_MODULES já carregados depois de importar `module`."""
+    check = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout.split()
+
+
+def import_time(args):
+    """Confere o tempo de importação do app contra um orçamento (cold start)."""
+    runs = [_import_times(args.module) for _ in range(args.runs)]
+    total, modules = min(runs, key=lambda run: run[0])
+    print(f"import {args.module}: {total:.1f} ms (best of {args.runs})")
+    for ms, name in sorted(modules, reverse=True)[: args.top]:
+        print(f"  {ms:8.1f} ms {name}")
+    failed = False
+    eager = _eager_modules(args.module)
+    if eager:
+        print(f"Imported eagerly (must be lazy): {', '.join(eager)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"Import time budget exceeded: {total:.1f} > {args.budget_ms} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database management commands")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("create", help="Create tables and apply migrations (default)")
+    commands.add_parser("migrate", help="Create tables and apply migrations")
+    commands.add_parser(
+        "rebuild-rollups", help="Rebuild hourly/daily rollups from raw readings"
+    )
+    compact_cmd = commands.add_parser(
+        "compact", help="Delete raw readings older than the hot window"
+    )
+    compact_cmd.add_argument(
+        "--hot-days", type=int, default=retention.RETENTION_HOT_DAYS
+    )
+    compact_cmd.add_argument(
+        "--archive-dir",
+        default=retention.ARCHIVE_DIR,
+        help="Also write the deleted rows to Parquet files here (needs pyarrow)",
+    )
+    partition_cmd = commands.add_parser(
+        "partition", help="Partition readings by month (or add upcoming months)"
+    )
+    partition_cmd.add_argument("--months-ahead", type=int, default=3)
+    seed_cmd = commands.add_parser("seed", help="Insert synthetic readings")
+    seed_cmd.add_argument("--days", type=int, default=30)
+    seed_cmd.add_argument("--interval-minutes", type=int, default=5)
+    seed_cmd.add_argument("--seed", type=int, default=42)
+    seed_cmd.add_argument("--station", default=DEFAULT_STATION)
+    csv_cmd = commands.add_parser(
+        "import", help="Bulk-load readings from a CSV export (- for stdin)"
+    )
+    csv_cmd.add_argument("path")
+    csv_cmd.add_argument(
+        "--station",
+        default=DEFAULT_STATION,
+        help="station_id for rows without one",
+    )
+    csv_cmd.add_argument("--batch-size", type=int, default=importer.IMPORT_BATCH_ROWS)
+    commands.add_parser("explain", help="Show query plans for the main queries")
+    import_cmd = commands.add_parser(
+        "import-time", help="Check the app import time against a budget"
+    )
+    import_cmd.add_argument("--module", default="app")
+    import_cmd.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    import_cmd.add_argument("--runs", type=int, default=3)
+    import_cmd.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    handlers = {
+        None: migrate,
+        "create": migrate,
+        "migrate": migrate,
+        "rebuild-rollups": rebuild_rollups,
+        "compact": compact,
+        "partition": partition,
+        "seed": seed,
+        "import": import_readings,
+        "explain": explain,
+        "import-time": import_time,
+    }
+    handlers[args.command](args)
+
 
-with engine.begin() as conn:
-    result = conn.execute(text("SELECT 1"))
-    print(result.fetchall())
-Base.metadata.create_all(bind=engine)
+if __name__ == "__main__":
+    main()
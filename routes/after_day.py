@@ -1,13 +1,26 @@
 from datetime import date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.configs.database import get_session
+from database.configs.database import get_async_session
+from utils import histograms
+from utils.cache import cached
+from utils.columnar import encode, series_format, to_columns
+from utils.conditional import conditional
+from utils.downsample import MODE_QUERY, POINTS_QUERY, downsample
+from utils.rollups import day_stats
+from utils.stations import STATION_QUERY, station_clause
 
 router = APIRouter(prefix="/after-day", tags=["AfterDay"])
 
+# O dia anterior já está fechado: a resposta só muda à meia-noite ou se chegar
+# uma leitura atrasada (o cache é invalidado nesse caso)
+HISTORY_TTL_SECONDS = 24 * 60 * 60
+# Navegadores reusam a resposta sem revalidar por até uma hora
+HISTORY_MAX_AGE_SECONDS = 60 * 60
+
 
 def _day_bounds(target: date):
     start = datetime.combine(target, datetime.min.time())
@@ -15,39 +28,37 @@ def _day_bounds(target: date):
     return start, end
 
 
+def _downsampled(session, query, params, points, mode):
+    result = session.execute(query, params)
+    return downsample(result.mappings(), points, mode)
+
+
 @router.get("/summary")
-def yesterday_summary(session: Session = Depends(get_session)):
+@conditional("history", HISTORY_MAX_AGE_SECONDS, until_midnight=True)
+@cached(ttl=HISTORY_TTL_SECONDS, scope="history")
+async def yesterday_summary(
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
     target = date.today() - timedelta(days=1)
-    start, end = _day_bounds(target)
     try:
-        query = text(
-            """
-            SELECT 
-                COUNT(*) as count,
-                AVG(temperature) as temp_avg,
-                MIN(temperature) as temp_min,
-                MAX(temperature) as temp_max,
-                AVG(humidity) as hum_avg,
-                MIN(humidity) as hum_min,
-                MAX(humidity) as hum_max
-            FROM readings
-            WHERE timestamp >= :start AND timestamp < :end
-            """
-        )
-        result = session.execute(query, {"start": start, "end": end}).mappings().first()
+        result = await session.run_sync(day_stats, target, station)
         if not result or result["count"] == 0:
             return {"error": "No data for yesterday", "date": target.isoformat()}
+        bins = await session.run_sync(histograms.window_bins, target, target, station)
         return {
             "date": target.isoformat(),
             "temperature": {
                 "avg": round(float(result["temp_avg"]), 2),
                 "min": round(float(result["temp_min"]), 2),
                 "max": round(float(result["temp_max"]), 2),
+                "percentiles": histograms.percentiles(bins["temp"], "temp"),
             },
             "humidity": {
                 "avg": round(float(result["hum_avg"]), 2),
                 "min": round(float(result["hum_min"]), 2),
                 "max": round(float(result["hum_max"]), 2),
+                "percentiles": histograms.percentiles(bins["hum"], "hum"),
             },
             "count": int(result["count"]),
         }
@@ -57,19 +68,32 @@ def yesterday_summary(session: Session = Depends(get_session)):
 
 
 @router.get("/series")
-def yesterday_series(session: Session = Depends(get_session)):
+@conditional("history", HISTORY_MAX_AGE_SECONDS, until_midnight=True)
+@cached(ttl=HISTORY_TTL_SECONDS, scope="history")
+async def yesterday_series(
+    points: int | None = POINTS_QUERY,
+    mode: str = MODE_QUERY,
+    station: str | None = STATION_QUERY,
+    fmt: str = Depends(series_format),
+    session: AsyncSession = Depends(get_async_session),
+):
     target = date.today() - timedelta(days=1)
     start, end = _day_bounds(target)
     try:
         query = text(
-            """
+            f"""
             SELECT timestamp, temperature, humidity
             FROM readings
-            WHERE timestamp >= :start AND timestamp < :end
+            WHERE timestamp >= :start AND timestamp < :end{station_clause(station)}
             ORDER BY timestamp ASC
             """
-        )
-        rows = session.execute(query, {"start": start, "end": end}).mappings().all()
+        ).columns(timestamp=DateTime)
+        query = query.execution_options(stream_results=True)
+        params = {"start": start, "end": end, "station": station}
+        rows = await session.run_sync(_downsampled, query, params, points, mode)
+        if fmt != "rows":
+            payload = {"date": target.isoformat(), "data": to_columns(rows)}
+            return encode({**payload, "count": len(rows)}, fmt)
         data = [
             {
                 "timestamp": r["timestamp"].isoformat(),
@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.configs.database import get_async_session
+from routes.reading import STATION_WINDOW_QUERY, WINDOW_QUERY
+from utils.cache import cached
+from utils.columnar import encode, series_format, to_columns
+from utils.conditional import conditional
+from utils.downsample import MODE_QUERY, POINTS_QUERY, downsample
+from utils.latest import latest_reading
+from utils.stations import STATION_QUERY
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+# Janelas da página inicial, em dias; todas saem da varredura da maior delas
+WINDOWS = {"24h": 1, "15d": 15, "30d": 30}
+
+
+def _windows(session, end, station, points, mode):
+    """Uma única varredura do intervalo mais longo, fatiada por janela."""
+    starts = {name: end - timedelta(days=days) for name, days in WINDOWS.items()}
+    query = STATION_WINDOW_QUERY if station else WINDOW_QUERY
+    params = {"start": min(starts.values()), "station": station}
+    rows = session.execute(query, params).mappings().all()
+    # Linhas vêm ordenadas por timestamp: cada janela é um sufixo da lista
+    stamps = [row["timestamp"] for row in rows]
+    return {
+        name: downsample(rows[bisect_left(stamps, start) :], points, mode)
+        for name, start in starts.items()
+    }
+
+
+@router.get("")
+@conditional()
+@cached()
+async def dashboard(
+    points: int | None = POINTS_QUERY,
+    mode: str = MODE_QUERY,
+    station: str | None = STATION_QUERY,
+    fmt: str = Depends(series_format),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Leitura atual e séries de 24h, 15 e 30 dias em uma só resposta."""
+    try:
+        end = datetime.now()
+        windows = await session.run_sync(_windows, end, station, points, mode)
+        latest = await run_in_threadpool(latest_reading.get, station)
+        if fmt != "rows":
+            columns = {name: to_columns(rows) for name, rows in windows.items()}
+            return encode({"latest": latest, **columns}, fmt)
+        return {"latest": latest, **windows}
+    except Exception as e:
+        print(f"Error in dashboard: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
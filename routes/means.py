@@ -1,136 +1,232 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from itertools import accumulate
 
-from database.configs.database import get_session
-from utils.math import calculate_eto
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.configs.database import get_async_session
+from utils import histograms
+from utils.cache import cached
+from utils.conditional import conditional
+from utils.math import calculate_eto, calculate_eto_array, hargreaves_eto
+from utils.rollups import daily_stats, days_stats, windows_stats
+from utils.stations import STATION_QUERY
 
 router = APIRouter(prefix="/means", tags=["means"])
 
+METHOD_QUERY = Query(
+    "blaney-criddle",
+    pattern="^(blaney-criddle|hargreaves)$",
+    description="blaney-criddle (médias diárias) ou hargreaves (Tmin/Tmax + Ra)",
+)
+
+
+# Períodos aceitos em /stats: dias inteiros, até 10 anos
+PERIODS_QUERY = Query(
+    "15d,30d",
+    pattern=r"^\d{1,4}d(,\d{1,4}d){0,9}$",
+    description="Períodos separados por vírgula, ex.: 1d,7d,30d,365d",
+)
+MAX_PERIOD_DAYS = 3650
+
+
+def _stats_payload(stats, period: str) -> dict:
+    if not stats or stats["count"] == 0:
+        return {"error": f"No data available for the last {period[:-1]} days"}
+    # Calcular evapotranspiração média
+    eto_avg = calculate_eto(float(stats["temp_avg"]), float(stats["hum_avg"]))
+
+    return {
+        "temperature": {
+            "avg": round(float(stats["temp_avg"]), 2),
+            "min": round(float(stats["temp_min"]), 2),
+            "max": round(float(stats["temp_max"]), 2),
+        },
+        "humidity": {
+            "avg": round(float(stats["hum_avg"]), 2),
+            "min": round(float(stats["hum_min"]), 2),
+            "max": round(float(stats["hum_max"]), 2),
+        },
+        "evapotranspiration": {"avg": round(eto_avg, 3)},
+        "period": period,
+        "count": int(stats["count"]),
+    }
+
+
+async def _periods_stats(session, periods: list[str], station: str | None):
+    now = datetime.now()
+    starts = [now - timedelta(days=int(period[:-1])) for period in periods]
+    stats = await session.run_sync(windows_stats, starts, station)
+    return {
+        period: _stats_payload(window, period) for period, window in zip(periods, stats)
+    }
+
+
+@router.get("/stats")
+@conditional()
+@cached()
+async def stats(
+    periods: str = PERIODS_QUERY,
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Estatísticas de vários períodos (uma consulta), indexadas pelo período."""
+    requested = list(dict.fromkeys(periods.split(",")))
+    if any(not 1 <= int(period[:-1]) <= MAX_PERIOD_DAYS for period in requested):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Periods must be between 1d and {MAX_PERIOD_DAYS}d",
+        )
+    try:
+        return await _periods_stats(session, requested, station)
+    except Exception as e:
+        print(f"Error in stats: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 
 @router.get("/stats/15d")
-def stats_15d(session: Session = Depends(get_session)):
+@conditional()
+@cached()
+async def stats_15d(
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
-        query = text("""
-                     SELECT 
-                        AVG(temperature) as temp_avg,
-                        MIN(temperature) as temp_min, 
-                        MAX(temperature) as temp_max,
-                        AVG(humidity) as hum_avg,
-                        MIN(humidity) as hum_min,
-                        MAX(humidity) as hum_max,
-                        COUNT(*) as count
-                     FROM readings 
-                     WHERE timestamp >= NOW() - INTERVAL 15 DAY
-                     """)
-        result = session.execute(query)
-        stats = result.mappings().first()
-
-        if stats and stats["count"] > 0:
-            # Calcular evapotranspiração média
-            eto_avg = calculate_eto(float(stats["temp_avg"]), float(stats["hum_avg"]))
-
-            return {
-                "temperature": {
-                    "avg": round(float(stats["temp_avg"]), 2),
-                    "min": round(float(stats["temp_min"]), 2),
-                    "max": round(float(stats["temp_max"]), 2),
-                },
-                "humidity": {
-                    "avg": round(float(stats["hum_avg"]), 2),
-                    "min": round(float(stats["hum_min"]), 2),
-                    "max": round(float(stats["hum_max"]), 2),
-                },
-                "evapotranspiration": {"avg": round(eto_avg, 3)},
-                "period": "15d",
-                "count": int(stats["count"]),
-            }
-        else:
-            return {"error": "No data available for the last 15 days"}
+        return (await _periods_stats(session, ["15d"], station))["15d"]
     except Exception as e:
         print(f"Error in stats_15d: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("/stats/30d")
-def stats_30d(session: Session = Depends(get_session)):
+@conditional()
+@cached()
+async def stats_30d(
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
-        query = text("""
-                     SELECT 
-                        AVG(temperature) as temp_avg,
-                        MIN(temperature) as temp_min, 
-                        MAX(temperature) as temp_max,
-                        AVG(humidity) as hum_avg,
-                        MIN(humidity) as hum_min,
-                        MAX(humidity) as hum_max,
-                        COUNT(*) as count
-                     FROM readings 
-                     WHERE timestamp >= NOW() - INTERVAL 30 DAY
-                     """)
-        result = session.execute(query)
-        stats = result.mappings().first()
-
-        if stats and stats["count"] > 0:
-            # Calcular evapotranspiração média
-            eto_avg = calculate_eto(float(stats["temp_avg"]), float(stats["hum_avg"]))
-
-            return {
-                "temperature": {
-                    "avg": round(float(stats["temp_avg"]), 2),
-                    "min": round(float(stats["temp_min"]), 2),
-                    "max": round(float(stats["temp_max"]), 2),
-                },
-                "humidity": {
-                    "avg": round(float(stats["hum_avg"]), 2),
-                    "min": round(float(stats["hum_min"]), 2),
-                    "max": round(float(stats["hum_max"]), 2),
-                },
-                "evapotranspiration": {"avg": round(eto_avg, 3)},
-                "period": "30d",
-                "count": int(stats["count"]),
-            }
-        else:
-            return {"error": "No data available for the last 30 days"}
+        return (await _periods_stats(session, ["30d"], station))["30d"]
     except Exception as e:
         print(f"Error in stats_30d: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/distribution")
+@conditional()
+@cached()
+async def distribution(
+    period: str = Query("30d", pattern=r"^\d{1,4}d$"),
+    temp_bin: float = Query(1.0, ge=0.1, le=50, description="Largura da faixa (°C)"),
+    hum_bin: float = Query(5.0, ge=0.5, le=50, description="Largura da faixa (%)"),
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Percentis e histogramas dos N dias do período (até hoje, inclusive).
+
+    Saem dos histogramas diários, sem ler as leituras brutas; o erro dos
+    percentis é de no máximo 0,1 °C / 0,5 %.
+    """
+    days = int(period[:-1])
+    if not 1 <= days <= MAX_PERIOD_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Period must be between 1d and {MAX_PERIOD_DAYS}d"
+        )
+    for metric, width in (("temp", temp_bin), ("hum", hum_bin)):
+        try:
+            histograms.bin_step(metric, width)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    # Mesmos N dias de /stats, em dias inteiros (os histogramas são diários)
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    try:
+        bins = await session.run_sync(histograms.window_bins, start, end, station)
+        result = {"period": period, "start": start.isoformat(), "end": end.isoformat()}
+        for metric, name, width in (
+            ("temp", "temperature", temp_bin),
+            ("hum", "humidity", hum_bin),
+        ):
+            result[name] = {
+                "count": sum(n for _, n in bins[metric]),
+                "percentiles": histograms.percentiles(bins[metric], metric),
+                "histogram": histograms.histogram(bins[metric], metric, width),
+            }
+        return result
+    except Exception as e:
+        print(f"Error in distribution: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _eto_series(daily_data, method: str) -> list[dict]:
+    """Calcula a ETo de todos os dias de uma vez (arrays) e a soma acumulada."""
+    if not daily_data:
+        return []
+    days = [day["date"] for day in daily_data]
+    temps = [float(day["temp_avg"]) for day in daily_data]
+    hums = [float(day["hum_avg"]) for day in daily_data]
+    if method == "hargreaves":
+        eto = hargreaves_eto(
+            days,
+            [float(day["temp_min"]) for day in daily_data],
+            [float(day["temp_max"]) for day in daily_data],
+            temps,
+        )
+    else:
+        eto = calculate_eto_array(temps, hums)
+    eto = eto.tolist()
+
+    return [
+        {
+            "date": day.isoformat(),
+            "temperature": round(temp, 2),
+            "humidity": round(hum, 2),
+            "evapotranspiration": round(value, 3),
+            "evapotranspiration_cumulative": round(total, 3),
+        }
+        for day, temp, hum, value, total in zip(days, temps, hums, eto, accumulate(eto))
+    ]
+
+
+@router.get("/evapotranspiration")
+@conditional()
+async def evapotranspiration_range(
+    start: date = Query(..., description="Formato YYYY-MM-DD"),
+    end: date | None = Query(None, description="Formato YYYY-MM-DD (padrão: hoje)"),
+    method: str = METHOD_QUERY,
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
+    end = end or date.today()
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    try:
+        daily_data = await session.run_sync(days_stats, start, end, station)
+        return _eto_series(daily_data, method)
+    except Exception as e:
+        print(f"Error in evapotranspiration_range: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/evapotranspiration/{period}")
-def evapotranspiration_daily(period: str, session: Session = Depends(get_session)):
+@conditional()
+@cached()
+async def evapotranspiration_daily(
+    period: str,
+    method: str = METHOD_QUERY,
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
         if period not in ["15d", "30d"]:
             raise HTTPException(status_code=400, detail="Period must be 15d or 30d")
 
         days = 15 if period == "15d" else 30
 
-        query = text(f"""
-                     SELECT 
-                        DATE(timestamp) as date,
-                        AVG(temperature) as temp_avg,
-                        AVG(humidity) as hum_avg
-                     FROM readings 
-                     WHERE timestamp >= NOW() - INTERVAL {days} DAY
-                     GROUP BY DATE(timestamp)
-                     ORDER BY date ASC
-                     """)
-
-        result = session.execute(query)
-        daily_data = result.mappings().all()
-
-        eto_data = []
-        for day in daily_data:
-            eto_value = calculate_eto(float(day["temp_avg"]), float(day["hum_avg"]))
-            eto_data.append(
-                {
-                    "date": day["date"].isoformat(),
-                    "temperature": round(float(day["temp_avg"]), 2),
-                    "humidity": round(float(day["hum_avg"]), 2),
-                    "evapotranspiration": round(eto_value, 3),
-                }
-            )
-
-        return eto_data
+        start = datetime.now() - timedelta(days=days)
+        daily_data = await session.run_sync(daily_stats, start, station)
+
+        return _eto_series(daily_data, method)
     except Exception as e:
         print(f"Error in evapotranspiration_daily: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,32 +1,176 @@
+import asyncio
 import datetime
+import json
 from http import HTTPStatus
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.configs.database import get_session
+from database.configs.database import get_async_engine, get_async_session
 from database.models.entities.readings import Readings
 from database.models.schemas.readings import (
+    ReadingBatchItemResult,
+    ReadingBatchItemSchema,
+    ReadingBatchResponse,
     ReadingSchema,
     ReadingSchemaResponse,
 )
-from utils.dataframe import get_csv_bytes
+from utils import retention, shared
+from utils.cache import response_cache
+from utils.columnar import encode, series_format, to_columns
+from utils.conditional import conditional
+from utils.dataframe import get_csv_stream
+from utils.downsample import MODE_QUERY, POINTS_QUERY, downsample
+from utils.hub import reading_hub
+from utils.ingest import INGEST_MODE, ingest_buffer, insert_readings
+from utils.latest import latest_reading
+from utils.pagination import (
+    CURSOR_QUERY,
+    LIMIT_QUERY,
+    decode_cursor,
+    encode_cursor,
+)
+from utils.rollups import apply_readings
+from utils.shared import shared_ring
+from utils.stations import STATION_QUERY, station_clause
 
 router = APIRouter(prefix="/readings", tags=["Readings"])
 
+# Linhas buscadas por vez no cursor do servidor durante a exportação CSV
+EXPORT_CHUNK_SIZE = 2000
+
+# Limites do endpoint de lote
+MAX_BATCH_SIZE = 5000
+MAX_CLOCK_SKEW = datetime.timedelta(minutes=5)
+
+# Server-Sent Events
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RETRY_MS = 5000
+# Cada conexão é encerrada depois disso e o EventSource reconecta (após `retry`):
+# conexões abertas não seguram o desligamento do servidor indefinidamente
+STREAM_MAX_SECONDS = 5 * 60
+
+_WINDOW_SQL = """
+                    SELECT temperature, humidity, timestamp
+                    FROM readings WHERE timestamp >= :start{station}
+                    ORDER BY timestamp ASC
+                    """
+# Sem filtro usa o índice de timestamp; com filtro, o índice (station_id, timestamp)
+# Colunas tipadas: drivers como o aiosqlite devolvem o timestamp como texto
+WINDOW_QUERY = (
+    text(_WINDOW_SQL.format(station=""))
+    .columns(timestamp=DateTime)
+    .execution_options(stream_results=True)
+)
+STATION_WINDOW_QUERY = (
+    text(_WINDOW_SQL.format(station=station_clause("station")))
+    .columns(timestamp=DateTime)
+    .execution_options(stream_results=True)
+)
+
+
+def _window_series(session, start, station, points, mode):
+    """Lê a janela com cursor no servidor e reduz a série (roda via run_sync)."""
+    query = STATION_WINDOW_QUERY if station else WINDOW_QUERY
+    readings = session.execute(query, {"start": start, "station": station})
+    return downsample(readings.mappings(), points, mode)
+
+
+def _page_query(start, end, after_id, station):
+    # `timestamp >= :start` delimita a busca no índice (timestamp, id); o OR só
+    # descarta as linhas do mesmo instante já entregues na página anterior
+    where = []
+    if start is not None:
+        where.append("timestamp >= :start")
+        if after_id is not None:
+            where.append("(timestamp > :start OR id > :after_id)")
+    if end is not None:
+        where.append("timestamp < :end")
+    sql = f"""
+        SELECT id, timestamp, temperature, humidity, station_id
+        FROM readings WHERE {" AND ".join(where) or "1 = 1"}{station_clause(station)}
+        ORDER BY timestamp ASC, id ASC
+        LIMIT :limit
+    """
+    return text(sql).columns(timestamp=DateTime)
+
+
+@router.get("")
+@conditional()
+async def list_readings(
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    limit: int = LIMIT_QUERY,
+    cursor: str | None = CURSOR_QUERY,
+    station: str | None = STATION_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Leituras brutas de [start, end) em ordem de (timestamp, id), paginadas.
+
+    `next_cursor` aponta para a última leitura entregue e vem mesmo na última
+    página, para que o cliente continue de onde parou em uma sincronização
+    incremental; `has_more` indica se já há mais leituras no intervalo.
+    """
+    after_id = None
+    if cursor is not None:
+        try:
+            start, after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+    # Normaliza datetimes com timezone para naive (compatível com MySQL DATETIME)
+    if start is not None and start.tzinfo is not None:
+        start = start.astimezone().replace(tzinfo=None)
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone().replace(tzinfo=None)
+
+    # Antes da marca d'água só há agregados horários: páginas vazias ali seriam
+    # confundidas com ausência de leituras
+    if start is None or retention.may_be_compacted(start):
+        compacted_until = await session.run_sync(retention.watermark)
+        if compacted_until is not None and (start is None or start < compacted_until):
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST,
+                f"Raw readings before {compacted_until.isoformat()} were compacted; "
+                "start at or after it (older data: GET /api/readings/file)",
+            )
+
+    try:
+        params = {
+            "start": start,
+            "end": end,
+            "after_id": after_id,
+            "station": station,
+            "limit": limit + 1,
+        }
+        result = await session.execute(
+            _page_query(start, end, after_id, station), params
+        )
+        items = [dict(row) for row in result.mappings()]
+        has_more = len(items) > limit
+        del items[limit:]
+
+        next_cursor = cursor
+        if items:
+            next_cursor = encode_cursor(items[-1]["timestamp"], items[-1]["id"])
+        return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
+    except Exception as e:
+        print(f"Error in list_readings: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 
 @router.get("/latest")
-def get_latest(session: Session = Depends(get_session)):
+@conditional()
+async def get_latest(station: str | None = STATION_QUERY):
     try:
-        query = text("""
-                    SELECT temperature, humidity, timestamp 
-                    FROM readings 
-                    ORDER BY timestamp DESC 
-                    LIMIT 1
-                     """)
-        latest_reading = session.execute(query)
-        result = latest_reading.mappings().first()
+        # Normalmente só memória; consulta o banco apenas se a carga inicial falhou
+        shared.sync()
+        result = await run_in_threadpool(latest_reading.get, station)
 
         if result:
             return result
@@ -37,16 +181,78 @@ def get_latest(session: Session = Depends(get_session)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/latest/stations")
+@conditional()
+async def get_latest_stations():
+    """Última leitura de cada estação conhecida."""
+    try:
+        return await run_in_threadpool(latest_reading.stations)
+    except Exception as e:
+        print(f"Error in get_latest_stations: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/stream")
+async def stream(station: str | None = STATION_QUERY):
+    """Server-Sent Events: envia cada nova leitura assim que ela é gravada."""
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STREAM_MAX_SECONDS
+        queue = None
+        try:
+            # Inscrição dentro do try: o finally sempre a desfaz
+            queue = reading_hub.subscribe(station)
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            current = await run_in_threadpool(latest_reading.get, station)
+            if current:
+                payload = json.dumps(jsonable_encoder(current))
+                yield f"event: reading\ndata: {payload}\n\n"
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), timeout=min(STREAM_HEARTBEAT_SECONDS, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if payload is None:
+                    # Cliente lento demais: foi removido do hub
+                    break
+                yield f"event: reading\ndata: {payload}\n\n"
+        finally:
+            if queue is not None:
+                reading_hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/24h")
-def last_24h(session: Session = Depends(get_session)):
+@conditional()
+async def last_24h(
+    points: int | None = POINTS_QUERY,
+    mode: str = MODE_QUERY,
+    station: str | None = STATION_QUERY,
+    fmt: str = Depends(series_format),
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
-        query = text("""
-                     SELECT temperature, humidity, timestamp 
-                     FROM readings WHERE timestamp >= NOW() - INTERVAL 1 DAY ORDER BY timestamp ASC
-                     """)
-        lasts_24h_readings = session.execute(query)
-        results = lasts_24h_readings.mappings().all()
+        start = datetime.datetime.now() - datetime.timedelta(days=1)
+        # Com vários workers, a janela sai da memória compartilhada
+        rows = shared.window(start, station)
+        if rows is not None:
+            results = downsample(rows, points, mode)
+        else:
+            results = await session.run_sync(
+                _window_series, start, station, points, mode
+            )
 
+        if fmt != "rows":
+            return encode(to_columns(results), fmt)
         return results
     except Exception as e:
         print(f"Error in last_24h: {e}")
@@ -54,15 +260,20 @@ def last_24h(session: Session = Depends(get_session)):
 
 
 @router.get("/15d")
-def last_15d(session: Session = Depends(get_session)):
+@conditional()
+async def last_15d(
+    points: int | None = POINTS_QUERY,
+    mode: str = MODE_QUERY,
+    station: str | None = STATION_QUERY,
+    fmt: str = Depends(series_format),
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
-        query = text("""
-                     SELECT temperature, humidity, timestamp 
-                     FROM readings WHERE timestamp >= NOW() - INTERVAL 15 DAY ORDER BY timestamp ASC
-                     """)
-        lasts_15d_readings = session.execute(query)
-        results = lasts_15d_readings.mappings().all()
+        start = datetime.datetime.now() - datetime.timedelta(days=15)
+        results = await session.run_sync(_window_series, start, station, points, mode)
 
+        if fmt != "rows":
+            return encode(to_columns(results), fmt)
         return results
     except Exception as e:
         print(f"Error in last_15d: {e}")
@@ -70,15 +281,20 @@ def last_15d(session: Session = Depends(get_session)):
 
 
 @router.get("/30d")
-def last_30d(session: Session = Depends(get_session)):
+@conditional()
+async def last_30d(
+    points: int | None = POINTS_QUERY,
+    mode: str = MODE_QUERY,
+    station: str | None = STATION_QUERY,
+    fmt: str = Depends(series_format),
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
-        query = text("""
-                     SELECT temperature, humidity, timestamp 
-                     FROM readings WHERE timestamp >= NOW() - INTERVAL 30 DAY ORDER BY timestamp ASC
-                     """)
-        lasts_30d_readings = session.execute(query)
-        results = lasts_30d_readings.mappings().all()
+        start = datetime.datetime.now() - datetime.timedelta(days=30)
+        results = await session.run_sync(_window_series, start, station, points, mode)
 
+        if fmt != "rows":
+            return encode(to_columns(results), fmt)
         return results
     except Exception as e:
         print(f"Error in last_30d: {e}")
@@ -86,28 +302,152 @@ def last_30d(session: Session = Depends(get_session)):
 
 
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=ReadingSchemaResponse)
-def add(reading: ReadingSchema, session: Session = Depends(get_session)):
+async def add(
+    reading: ReadingSchema,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+):
+    if ingest_buffer is not None:
+        # Modo buffered: a leitura é gravada depois, em lote, pela thread de ingestão
+        row = {**reading.model_dump(), "timestamp": datetime.datetime.now()}
+        if not ingest_buffer.submit(row):
+            raise HTTPException(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                "Ingest queue is full",
+                headers={"Retry-After": "1"},
+            )
+        response.status_code = HTTPStatus.ACCEPTED
+        return row
     try:
         new_reading = Readings(**reading.model_dump())
         session.add(new_reading)
-        session.commit()
-        session.refresh(new_reading)
+        await session.flush()
+        await session.run_sync(apply_readings, [new_reading])
+        await session.commit()
+        await session.refresh(new_reading)
+        latest_reading.offer([new_reading])
+        if shared_ring is not None:
+            shared_ring.append([new_reading])
+        response_cache.bump([new_reading.timestamp])
+        reading_hub.publish(
+            ReadingSchemaResponse.model_validate(new_reading, from_attributes=True)
+        )
         return new_reading
     except Exception as e:
         print(f"Error in add: {e}")
-        session.rollback()
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def _export_chunks(conn, result, remaining):
+    """Lotes da primeira consulta e, em seguida, das demais camadas."""
+    try:
+        while True:
+            async for chunk in result.mappings().partitions():
+                yield chunk
+            await result.close()
+            if not remaining:
+                break
+            query, params = remaining.pop(0)
+            result = await conn.stream(_exported(query), params)
+    finally:
+        await result.close()
+        await conn.close()
+
+
+def _exported(query):
+    return query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+
+@router.get("/ingest")
+async def ingest_stats():
+    stats = ingest_buffer.stats() if ingest_buffer is not None else {}
+    return {"mode": INGEST_MODE, **stats}
+
+
+@router.get("/cache")
+async def cache_stats():
+    return response_cache.stats()
+
+
+@router.post(
+    "/batch", status_code=HTTPStatus.CREATED, response_model=ReadingBatchResponse
+)
+async def add_batch(
+    items: list[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Insert a buffered batch of readings in a single transaction.
+
+    Each item may carry its own `timestamp` (leituras guardadas pelo dispositivo
+    durante quedas de WiFi). Invalid items are rejected individually and do not
+    prevent the others from being stored.
+    """
+    now = datetime.datetime.now()
+    rows, results = [], []
+    for index, item in enumerate(items):
+        try:
+            reading = ReadingBatchItemSchema.model_validate(item)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"]) or "item"
+            results.append(
+                ReadingBatchItemResult(
+                    index=index, accepted=False, error=f"{field}: {error['msg']}"
+                )
+            )
+            continue
+
+        timestamp = reading.timestamp or now
+        # Converte para horário local sem timezone (compatível com MySQL DATETIME)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        if timestamp > now + MAX_CLOCK_SKEW:
+            results.append(
+                ReadingBatchItemResult(
+                    index=index, accepted=False, error="timestamp is in the future"
+                )
+            )
+            continue
+
+        rows.append(
+            {
+                "timestamp": timestamp,
+                "temperature": reading.temperature,
+                "humidity": reading.humidity,
+                "station_id": reading.station_id,
+            }
+        )
+        results.append(ReadingBatchItemResult(index=index, accepted=True))
+
+    try:
+        await session.run_sync(insert_readings, rows)
+        await session.commit()
+        latest_reading.offer(rows)
+        if shared_ring is not None:
+            shared_ring.append(rows)
+        response_cache.bump(r["timestamp"] for r in rows)
+    except Exception as e:
+        print(f"Error in add_batch: {e}")
+        await session.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    if rows:
+        reading_hub.publish_newest(rows)
+    return ReadingBatchResponse(
+        accepted=len(rows), rejected=len(results) - len(rows), results=results
+    )
+
 
 @router.get("/file")
-def get_file(
-    timestamp: datetime.datetime | None = None,
-    session: Session = Depends(get_session),
+async def get_file(
+    timestamp: datetime.datetime | None = None, station: str | None = STATION_QUERY
 ):
     """Get readings from a specific timestamp.
 
     Args:
         timestamp (datetime.datetime): The timestamp to filter readings from. Defaults to current time.
+        station (str): Only export readings from this station. Defaults to all.
     """
     try:
         # Define o timestamp padrão no momento da requisição
@@ -118,17 +458,24 @@ def get_file(
         if getattr(timestamp, "tzinfo", None) is not None:
             timestamp = timestamp.replace(tzinfo=None)
 
-        query = text("""
-        SELECT timestamp,temperature,humidity FROM readings
-        WHERE timestamp >= :timestamp
-        ORDER BY timestamp ASC
-        """)
-        result = session.execute(query, {"timestamp": timestamp})
-        if not result:
-            raise HTTPException(
-                HTTPStatus.BAD_REQUEST, "Is not possible take registers"
-            )
-        rows = result.mappings().all()
-        return get_csv_bytes(rows, filename="readings.csv")
+        # Conexão própria com cursor no servidor: a resposta continua sendo
+        # enviada depois que a sessão da requisição já foi encerrada.
+        conn = await get_async_engine().connect()
+        try:
+            # Leituras já compactadas vêm dos agregados horários
+            compacted_until = None
+            if retention.may_be_compacted(timestamp):
+                compacted_until = await conn.run_sync(retention.watermark)
+            queries = retention.range_queries(timestamp, station, compacted_until)
+            query, params = queries.pop(0)
+            result = await conn.stream(_exported(query), params)
+        except Exception:
+            await conn.close()
+            raise
+        return get_csv_stream(
+            _export_chunks(conn, result, queries),
+            ["timestamp", "temperature", "humidity", "station_id"],
+            filename="readings.csv",
+        )
     except Exception as e:
         raise HTTPException(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
@@ -2,26 +2,51 @@ from datetime import date, timedelta
 
 from fastapi import APIRouter, HTTPException, Query
 
-from utils.math import _day_payload
+from utils.conditional import conditional
+from utils.math import _day_payload, ephemeris_range
 
 router = APIRouter(prefix="/sun", tags=["Sun"])
 
+# Maior intervalo aceito em /sun/range (dias)
+MAX_RANGE_DAYS = 3660
+
+# Efemérides de datas fixas não mudam; hoje/ontem valem até a meia-noite
+SUN_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
 
 @router.get("/today")
+@conditional("day", SUN_MAX_AGE_SECONDS, until_midnight=True)
 def sun_today():
     today = date.today()
     return _day_payload(today)
 
 
 @router.get("/yesterday")
+@conditional("day", SUN_MAX_AGE_SECONDS, until_midnight=True)
 def sun_yesterday():
     y = date.today() - timedelta(days=1)
     return _day_payload(y)
 
 
 @router.get("/day")
+@conditional("day", SUN_MAX_AGE_SECONDS)
 def sun_specific(day: date = Query(..., description="Formato YYYY-MM-DD")):
     try:
         return _day_payload(day)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/range")
+@conditional("day", SUN_MAX_AGE_SECONDS)
+def sun_range(
+    start: date = Query(..., description="Formato YYYY-MM-DD"),
+    end: date = Query(..., description="Formato YYYY-MM-DD"),
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Range must be at most {MAX_RANGE_DAYS} days"
+        )
+    return ephemeris_range(start, end)
@@ -7,6 +7,18 @@ google.charts.setOnLoadCallback(initializeApp);
 // Configuração do intervalo de atualização (em milissegundos)
 const UPDATE_INTERVAL = 30000; // 30 segundos
 
+// Máximo de pontos por série nos gráficos (redução feita no servidor)
+const CHART_POINTS = 500;
+
+// Converte a resposta colunar ({t, temp, hum}) em linhas para os gráficos
+function rowsFromColumns(columns) {
+  return columns.t.map((t, i) => ({
+    timestamp: new Date(t * 1000),
+    temperature: columns.temp[i],
+    humidity: columns.hum[i],
+  }));
+}
+
 async function fetchJSON(url) {
   const res = await fetch(url);
   if (!res.ok) throw new Error("Erro ao buscar dados: " + url);
@@ -34,12 +46,9 @@ function initializeApp() {
   if (hasCharts) {
     drawAll();
   }
-  if (hasCurrentCards) {
+  // Configurar atualizações automáticas: push via SSE, polling como fallback
+  if (hasCurrentCards && !subscribeReadings(renderCurrentReading)) {
     updateCurrentReading();
-  }
-
-  // Configurar atualizações automáticas
-  if (hasCurrentCards) {
     setInterval(updateCurrentReading, UPDATE_INTERVAL);
   }
 
@@ -170,12 +179,16 @@ function showLoadingState() {
 
 async function drawAll() {
   try {
-    // 24h
-    const data24h = await fetchJSON("/api/readings/24h");
-    // 15 dias
-    const data15d = await fetchJSON("/api/readings/15d");
-    // 30 dias (mensal)
-    const data30d = await fetchJSON("/api/readings/30d");
+    // 24h, 15 dias e 30 dias em uma só requisição (uma varredura no banco)
+    const bundle = await fetchJSON(
+      `/api/dashboard?points=${CHART_POINTS}&format=columnar`
+    );
+    const data24h = rowsFromColumns(bundle["24h"]);
+    const data15d = rowsFromColumns(bundle["15d"]);
+    const data30d = rowsFromColumns(bundle["30d"]);
+    if (document.getElementById("current-temp")) {
+      renderCurrentReading(bundle.latest);
+    }
 
     // === 24h - Gráficos de linha ===
     drawAreaChart(
@@ -516,6 +529,16 @@ function drawChart(rows, title, elementId, chartType = "LineChart") {
   chart.draw(dt, options);
 }
 
+// Recebe novas leituras do servidor (Server-Sent Events)
+function subscribeReadings(onReading) {
+  if (!window.EventSource) return false;
+  const source = new EventSource("/api/readings/stream");
+  source.addEventListener("reading", (event) => {
+    onReading(JSON.parse(event.data));
+  });
+  return true;
+}
+
 // Função para atualizar a leitura atual
 async function updateCurrentReading() {
   try {
@@ -523,43 +546,7 @@ async function updateCurrentReading() {
     const latest = await fetchJSON("/api/readings/latest");
 
     console.log("Dados recebidos da API:", latest); // Debug log
-
-    if (latest && latest.temperature !== null && latest.humidity !== null) {
-      console.log("Última leitura:", latest); // Debug log
-
-      // Atualiza os valores na interface
-      const tempValue = parseFloat(latest.temperature).toFixed(1);
-      const humidityValue = parseFloat(latest.humidity).toFixed(1);
-
-      document.getElementById("current-temp").textContent = `${tempValue}°C`;
-      document.getElementById(
-        "current-humidity"
-      ).textContent = `${humidityValue}%`;
-
-      // Formata a data/hora para exibição
-      const timestamp = new Date(latest.timestamp);
-      const formattedTime = timestamp.toLocaleString("pt-BR", {
-        day: "2-digit",
-        month: "2-digit",
-        year: "numeric",
-        hour: "2-digit",
-        minute: "2-digit",
-      });
-
-      document.getElementById("last-reading-time").textContent = formattedTime;
-
-      // Atualiza também o timestamp de atualização geral
-      document.getElementById(
-        "lastUpdate"
-      ).textContent = `Última atualização: ${new Date().toLocaleString(
-        "pt-BR"
-      )}`;
-    } else {
-      console.log("Nenhum dado encontrado ou dados nulos");
-      document.getElementById("current-temp").textContent = "--°C";
-      document.getElementById("current-humidity").textContent = "--%";
-      document.getElementById("last-reading-time").textContent = "Sem dados";
-    }
+    renderCurrentReading(latest);
   } catch (err) {
     console.error("Erro ao atualizar leitura atual:", err);
     document.getElementById("current-temp").textContent = "--°C";
@@ -568,3 +555,42 @@ async function updateCurrentReading() {
       "Erro ao carregar";
   }
 }
+
+function renderCurrentReading(latest) {
+  if (latest && latest.temperature !== null && latest.humidity !== null) {
+    console.log("Última leitura:", latest); // Debug log
+
+    // Atualiza os valores na interface
+    const tempValue = parseFloat(latest.temperature).toFixed(1);
+    const humidityValue = parseFloat(latest.humidity).toFixed(1);
+
+    document.getElementById("current-temp").textContent = `${tempValue}°C`;
+    document.getElementById(
+      "current-humidity"
+    ).textContent = `${humidityValue}%`;
+
+    // Formata a data/hora para exibição
+    const timestamp = new Date(latest.timestamp);
+    const formattedTime = timestamp.toLocaleString("pt-BR", {
+      day: "2-digit",
+      month: "2-digit",
+      year: "numeric",
+      hour: "2-digit",
+      minute: "2-digit",
+    });
+
+    document.getElementById("last-reading-time").textContent = formattedTime;
+
+    // Atualiza também o timestamp de atualização geral
+    document.getElementById(
+      "lastUpdate"
+    ).textContent = `Última atualização: ${new Date().toLocaleString(
+      "pt-BR"
+    )}`;
+  } else {
+    console.log("Nenhum dado encontrado ou dados nulos");
+    document.getElementById("current-temp").textContent = "--°C";
+    document.getElementById("current-humidity").textContent = "--%";
+    document.getElementById("last-reading-time").textContent = "Sem dados";
+  }
+}
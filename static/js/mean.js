@@ -31,8 +31,23 @@ function initializeStatsApp() {
       loadAllStats();
     });
 
-  // Atualização automática
-  setInterval(loadAllStats, UPDATE_INTERVAL);
+  // Atualização automática: recarrega quando chega leitura nova (SSE);
+  // sem suporte a EventSource, volta ao polling
+  if (window.EventSource) {
+    const source = new EventSource("/api/readings/stream");
+    let lastTimestamp = null;
+    source.addEventListener("reading", (event) => {
+      const timestamp = Date.parse(JSON.parse(event.data).timestamp);
+      // A cada (re)conexão o servidor reenvia a leitura atual: só recarrega
+      // se ela for mais nova que a última aplicada. A primeira já veio na
+      // carga inicial.
+      if (lastTimestamp !== null && timestamp <= lastTimestamp) return;
+      if (lastTimestamp !== null) loadAllStats();
+      lastTimestamp = timestamp;
+    });
+  } else {
+    setInterval(loadAllStats, UPDATE_INTERVAL);
+  }
 }
 
 function showLoadingState() {
@@ -52,18 +67,21 @@ async function loadAllStats() {
   if (!select) return; // página não carregada
   const period = select.value;
   try {
-    const [stats, etoData] = await Promise.all([
-      fetchJSON(`/api/means/stats/${period}`),
+    // Os dois períodos vêm de uma só consulta; a comparação reaproveita ambos
+    const [statsByPeriod, etoData, distribution] = await Promise.all([
+      fetchJSON("/api/means/stats?periods=15d,30d"),
       fetchJSON(`/api/means/evapotranspiration/${period}`),
+      fetchJSON(`/api/means/distribution?period=${period}&temp_bin=1&hum_bin=5`),
     ]);
+    const stats = statsByPeriod[period];
 
     updateSummaryCards(stats);
     drawTemperatureStats(stats, period);
     drawHumidityStats(stats, period);
-    drawPeriodComparison();
+    drawPeriodComparison(statsByPeriod);
     drawEvapotranspirationChart(etoData);
-    drawTemperatureDistribution(period);
-    drawHumidityDistribution(period);
+    drawTemperatureDistribution(distribution.temperature);
+    drawHumidityDistribution(distribution.humidity);
   } catch (err) {
     console.error("Erro ao carregar estatísticas:", err);
     // fallback visual mínimo
@@ -209,10 +227,10 @@ function drawHumidityStats(stats, period) {
   chart.draw(data, options);
 }
 
-async function drawPeriodComparison() {
+function drawPeriodComparison(statsByPeriod) {
   try {
-    const stats15d = await fetchJSON("/api/means/stats/15d");
-    const stats30d = await fetchJSON("/api/means/stats/30d");
+    const stats15d = statsByPeriod["15d"];
+    const stats30d = statsByPeriod["30d"];
 
     if (stats15d.error || stats30d.error) {
       document.getElementById("chart_period_comparison").innerHTML =
@@ -339,29 +357,19 @@ function drawEvapotranspirationChart(etoData) {
   );
   chart.draw(data, options);
 }
-async function drawTemperatureDistribution(period) {
+// Histogramas já agregados no servidor (faixas de 1 °C / 5 %)
+function drawTemperatureDistribution(temperature) {
   try {
-    const rawData = await fetchJSON(`/api/readings/${period}`);
-
-    if (!rawData || rawData.length === 0) {
+    if (!temperature || temperature.count === 0) {
       document.getElementById("chart_temp_distribution").innerHTML =
         '<p class="no-data">Nenhum dado disponível</p>';
       return;
     }
 
-    // Criar distribuição de temperatura
-    const tempRanges = {};
-    rawData.forEach((reading) => {
-      const temp = Math.floor(parseFloat(reading.temperature));
-      tempRanges[temp] = (tempRanges[temp] || 0) + 1;
-    });
-
     const rows = [["Temperatura (°C)", "Frequência"]];
-    Object.keys(tempRanges)
-      .sort((a, b) => a - b)
-      .forEach((temp) => {
-        rows.push([`${temp}°C`, tempRanges[temp]]);
-      });
+    temperature.histogram.forEach((bin) => {
+      rows.push([`${bin.from}°C`, bin.count]);
+    });
 
     const data = google.visualization.arrayToDataTable(rows);
 
@@ -396,11 +404,9 @@ async function drawTemperatureDistribution(period) {
   }
 }
 
-async function drawHumidityDistribution(period) {
+function drawHumidityDistribution(humidity) {
   try {
-    const rawData = await fetchJSON(`/api/readings/${period}`);
-
-    if (!rawData || rawData.length === 0) {
+    if (!humidity || humidity.count === 0) {
       document.getElementById("chart_humidity_distribution").innerHTML =
         '<p class="no-data">Nenhum dado disponível</p>';
       return;
@@ -415,13 +421,13 @@ async function drawHumidityDistribution(period) {
       "Muito Alta (85-100%)": 0,
     };
 
-    rawData.forEach((reading) => {
-      const humidity = parseFloat(reading.humidity);
-      if (humidity < 30) humidityRanges["Muito Baixa (0-30%)"]++;
-      else if (humidity < 50) humidityRanges["Baixa (30-50%)"]++;
-      else if (humidity < 70) humidityRanges["Ideal (50-70%)"]++;
-      else if (humidity < 85) humidityRanges["Alta (70-85%)"]++;
-      else humidityRanges["Muito Alta (85-100%)"]++;
+    // Os limites das faixas são múltiplos de 5 %: cada bin cai inteiro em uma
+    humidity.histogram.forEach((bin) => {
+      if (bin.from < 30) humidityRanges["Muito Baixa (0-30%)"] += bin.count;
+      else if (bin.from < 50) humidityRanges["Baixa (30-50%)"] += bin.count;
+      else if (bin.from < 70) humidityRanges["Ideal (50-70%)"] += bin.count;
+      else if (bin.from < 85) humidityRanges["Alta (70-85%)"] += bin.count;
+      else humidityRanges["Muito Alta (85-100%)"] += bin.count;
     });
 
     const rows = [["Faixa de Umidade", "Frequência"]];
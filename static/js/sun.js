@@ -1,3 +1,6 @@
+google.charts.load("current", { packages: ["corechart"] });
+google.charts.setOnLoadCallback(loadDayLengthCurve);
+
 async function fetchJSON(url) {
   const r = await fetch(url);
   if (!r.ok) throw new Error("Falha ao buscar " + url);
@@ -37,6 +40,43 @@ async function loadSpecificDate(d) {
   }
 }
 
+// Curva anual de duração do dia (uma única requisição para o ano inteiro)
+async function loadDayLengthCurve() {
+  const el = document.getElementById("chart_day_length");
+  if (!el) return;
+  try {
+    const year = new Date().getFullYear();
+    const days = await fetchJSON(
+      `/api/sun/range?start=${year}-01-01&end=${year}-12-31`
+    );
+    const rows = [["Data", "Duração do dia (h)"]];
+    days.forEach((d) => {
+      rows.push([new Date(d.date + "T00:00:00"), d.day_length_hours]);
+    });
+    const data = google.visualization.arrayToDataTable(rows);
+    const opts = {
+      title: `Duração do Dia - ${year}`,
+      backgroundColor: "transparent",
+      titleTextStyle: { color: "#e0e6ed", fontSize: 16 },
+      hAxis: { format: "MMM", textStyle: { color: "#8892b0" } },
+      vAxis: {
+        textStyle: { color: "#8892b0" },
+        gridlines: { color: "#2a2a3e" },
+        title: "Horas",
+        titleTextStyle: { color: "#e0e6ed" },
+      },
+      legend: { position: "none" },
+      height: 380,
+      chartArea: { left: 70, top: 60, width: "80%", height: "70%" },
+      colors: ["#ffb300"],
+      lineWidth: 3,
+    };
+    new google.visualization.LineChart(el).draw(data, opts);
+  } catch (e) {
+    console.error(e);
+  }
+}
+
 window.addEventListener("DOMContentLoaded", () => {
   loadSun();
   document.getElementById("refreshSunBtn")?.addEventListener("click", loadSun);
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Antes de qualquer import do app: a configuração do banco lê a URL ao carregar
+os.environ["DATABASE_URL"] = (
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'readings.db')}"
+)
@@ -0,0 +1,33 @@
+"""Validadores condicionais: If-Modified-Since expira junto com a ETag."""
+
+from email.utils import format_datetime
+
+from starlette.requests import Request
+
+from utils import conditional
+from utils.cache import CACHE_TTL_SECONDS
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_if_modified_since_expires_with_window(monkeypatch):
+    now = 1_700_000_000.0
+    changed = conditional.datetime.fromtimestamp(now - 3600, conditional.timezone.utc)
+    monkeypatch.setattr(conditional.time, "time", lambda: now)
+    monkeypatch.setattr(
+        conditional.response_cache, "version", lambda scope: (0, changed)
+    )
+    headers = conditional._validators(_request(), "live", 0, False)
+    since = format_datetime(
+        conditional.datetime.fromtimestamp(now, conditional.timezone.utc), usegmt=True
+    )
+    request = _request(if_modified_since=since)
+    assert conditional._not_modified(request, headers)
+
+    # Intervalo seguinte: a ETag muda e o Last-Modified passa da data do cliente
+    monkeypatch.setattr(conditional.time, "time", lambda: now + CACHE_TTL_SECONDS)
+    headers = conditional._validators(_request(), "live", 0, False)
+    assert not conditional._not_modified(request, headers)
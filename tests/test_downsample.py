@@ -0,0 +1,38 @@
+"""Redução de séries: buckets entre a primeira e a última linha."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.downsample import downsample
+
+
+def _rows(count, start):
+    return [
+        {
+            "timestamp": start + timedelta(minutes=5 * i),
+            "temperature": 20.0 + (i % 7),
+            "humidity": 60.0 - (i % 5),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("mode", ["lttb", "minmax"])
+def test_rows_in_part_of_window_use_all_points(mode):
+    # 50 linhas nas últimas ~4h de uma janela de 30 dias
+    rows = _rows(50, datetime(2024, 1, 30, 20))
+    result = downsample(rows, 10, mode)
+    assert len(result) <= 10
+    assert result[0] == rows[0]
+    if mode == "lttb":
+        assert len(result) == 10 and result[-1] == rows[-1]
+    else:
+        # Mais de um bucket: mais que as 4 escolhas (mín/máx × 2 séries) de um só
+        assert len(result) > 4
+
+
+def test_fits_without_reduction():
+    rows = _rows(5, datetime(2024, 1, 1))
+    assert downsample(rows, 10) == rows
+    assert downsample(iter(rows), None) == rows
@@ -0,0 +1,92 @@
+"""Rotas de séries no engine assíncrono do SQLite (aiosqlite).
+
+Consultas `text()` não tipam as colunas: no SQLite o timestamp volta como
+texto se a consulta não declarar `.columns(timestamp=DateTime)`.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import manager  # noqa: F401  (registra todas as entidades)
+from app import app
+from database.configs.database import Base, SessionLocal, get_engine
+from utils.ingest import insert_readings
+
+
+@pytest.fixture(scope="module")
+def client():
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    now = datetime.now().replace(microsecond=0)
+    rows = [
+        {
+            "timestamp": now - timedelta(hours=hours),
+            "temperature": 20 + hours % 7,
+            "humidity": 50 + hours % 11,
+            "station_id": "default",
+        }
+        for hours in range(0, 24 * 31, 3)
+    ]
+    # Pelo caminho normal de escrita, para preencher agregados e histogramas
+    with SessionLocal() as session:
+        insert_readings(session, rows)
+        session.commit()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/readings/24h",
+        "/api/readings/24h?points=5",
+        "/api/readings/15d",
+        "/api/readings/30d?format=columnar",
+        "/api/readings/latest",
+        "/api/dashboard",
+        "/api/after-day/series",
+        "/api/after-day/series?format=columnar",
+        "/api/readings/file",
+        "/api/means/evapotranspiration/15d",
+        "/api/means/evapotranspiration/15d?method=hargreaves",
+        "/api/means/evapotranspiration?start=2020-01-01",
+    ],
+)
+def test_series_routes(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert response.content not in (b"[]", b"{}")
+
+
+def test_writes_update_rollups(client):
+    """Inserções atualizam agregados e histogramas fora do MySQL (upsert)."""
+    earlier = datetime.now() - timedelta(hours=20)
+    assert client.post("/api/readings/", json={"temperature": 20, "humidity": 50})
+    response = client.post(
+        "/api/readings/batch",
+        json=[
+            {"temperature": 21, "humidity": 60, "timestamp": earlier.isoformat()},
+            {
+                "temperature": 22,
+                "humidity": 61,
+                "timestamp": earlier.isoformat(),
+                "station_id": "other",
+            },
+        ],
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["accepted"] == 2
+
+    stats = client.get("/api/means/stats?periods=1d,7d&station=other").json()
+    assert stats["1d"]["count"] == 1
+    assert stats["1d"]["temperature"]["max"] == 22
+    distribution = client.get("/api/means/distribution?station=other").json()
+    assert distribution["humidity"]["count"] == 1
+
+
+def test_sun_range_last_representable_year(client):
+    response = client.get("/api/sun/range?start=9999-12-01&end=9999-12-31")
+    assert response.status_code == 200, response.text
+    assert response.json()[-1]["date"] == "9999-12-31"
@@ -0,0 +1,177 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from datetime import time as dtime
+from functools import wraps
+
+# Cache das respostas dos endpoints de agregados (LRU em memória, com TTL).
+# CACHE_MAX_ENTRIES=0 desliga o cache.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+# "live": a resposta depende das leituras mais recentes e é invalidada a cada
+# inserção. "history": depende só de dias já encerrados; é invalidada apenas
+# quando chega uma leitura com timestamp anterior a hoje (ex.: lote atrasado).
+SCOPES = ("live", "history")
+
+
+class ResponseCache:
+    """LRU limitado por número de entradas, com TTL e marca d'água dos dados."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        # Marca d'água: versão incrementada por quem grava leituras
+        self._marks = {scope: 0 for scope in SCOPES}
+        # Quando cada marca mudou pela última vez (Last-Modified das respostas)
+        started = datetime.now(timezone.utc).replace(microsecond=0)
+        self._changed = {scope: started for scope in SCOPES}
+        self._newest = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def bump(self, timestamps):
+        """Registra leituras recém-gravadas (chamar depois do commit)."""
+        timestamps = list(timestamps)
+        if not timestamps:
+            return
+        today = datetime.combine(date.today(), dtime.min)
+        changed = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            self._marks["live"] += 1
+            self._changed["live"] = changed
+            if min(timestamps) < today:
+                self._marks["history"] += 1
+                self._changed["history"] = changed
+            newest = max(timestamps)
+            if self._newest is None or newest > self._newest:
+                self._newest = newest
+
+    def version(self, scope: str) -> tuple[int, datetime]:
+        """Marca atual do escopo e quando ela mudou (UTC)."""
+        with self._lock:
+            return self._marks[scope], self._changed[scope]
+
+    def _lookup(self, key, scope: str):
+        """Devolve (achou, valor, marca atual do escopo)."""
+        now = time.monotonic()
+        with self._lock:
+            mark = self._marks[scope]
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires, entry_mark = entry
+                if expires > now and entry_mark == mark:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value, mark
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return False, None, mark
+
+    def _store(self, key, value, mark: int, ttl: float | None):
+        # A marca é a lida antes do cálculo: uma inserção concorrente invalida
+        # este resultado na próxima consulta
+        expires = time.monotonic() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires, mark)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, ttl: float | None = None, scope="live"):
+        if not self.enabled:
+            return compute()
+        found, value, mark = self._lookup(key, scope)
+        if not found:
+            value = compute()
+            self._store(key, value, mark, ttl)
+        return value
+
+    async def aget_or_compute(
+        self, key, compute, ttl: float | None = None, scope="live"
+    ):
+        """Igual a `get_or_compute`, para `compute` assíncrono."""
+        if not self.enabled:
+            return await compute()
+        found, value, mark = self._lookup(key, scope)
+        if not found:
+            value = await compute()
+            self._store(key, value, mark, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "watermark": {**self._marks, "newest_timestamp": self._newest},
+            }
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+def cached(ttl: float | None = None, scope: str = "live", exclude=("session",)):
+    """Cacheia o retorno de um endpoint, com chave = endpoint + parâmetros.
+
+    Parâmetros em `exclude` (ex.: a sessão do banco) ficam fora da chave. No
+    escopo "history" a data de hoje entra na chave, já que "ontem" muda à
+    meia-noite.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown cache scope: {scope}")
+
+    def make_key(kwargs):
+        params = tuple(sorted((k, v) for k, v in kwargs.items() if k not in exclude))
+        key = (params,)
+        if scope == "history":
+            key += (date.today(),)
+        return key
+
+    def decorator(func):
+        name = (func.__module__, func.__qualname__)
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await response_cache.aget_or_compute(
+                    name + make_key(kwargs), lambda: func(*args, **kwargs), ttl, scope
+                )
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return response_cache.get_or_compute(
+                name + make_key(kwargs), lambda: func(*args, **kwargs), ttl, scope
+            )
+
+        return wrapper
+
+    return decorator
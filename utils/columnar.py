@@ -0,0 +1,63 @@
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException, Query, Request, Response
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele usa o json da biblioteca padrão
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # opcional: necessário apenas para format=msgpack
+    msgpack = None
+
+# Formatos das séries temporais:
+# "rows": lista de objetos {timestamp, temperature, humidity} (padrão)
+# "columnar": {"t": [epoch em segundos], "temp": [...], "hum": [...]}
+# "msgpack": o mesmo conteúdo colunar, em MessagePack
+FORMATS = ("rows", "columnar", "msgpack")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+FORMAT_QUERY = Query(None, pattern=f"^({'|'.join(FORMATS)})$")
+
+
+def series_format(request: Request, format: str | None = FORMAT_QUERY) -> str:
+    """Formato pedido via ?format= ou, na falta dele, pelo cabeçalho Accept."""
+    if not format:
+        accept = request.headers.get("accept", "")
+        msgpack_accepted = any(media_type in accept for media_type in MSGPACK_TYPES)
+        format = "msgpack" if msgpack_accepted else "rows"
+    if format == "msgpack" and msgpack is None:
+        raise HTTPException(406, "MessagePack support is not installed")
+    return format
+
+
+def to_columns(rows) -> dict:
+    t, temp, hum = [], [], []
+    for row in rows:
+        t.append(int(row["timestamp"].timestamp()))
+        temp.append(float(row["temperature"]))
+        hum.append(float(row["humidity"]))
+    return {"t": t, "temp": temp, "hum": hum}
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def encode(payload, fmt: str) -> Response:
+    """Serializa o payload já colunar em JSON (orjson, se houver) ou MessagePack."""
+    if fmt == "msgpack":
+        return Response(
+            msgpack.packb(payload, default=_default),
+            media_type="application/msgpack",
+        )
+    if orjson is not None:
+        content = orjson.dumps(payload)
+    else:
+        content = json.dumps(payload, default=_default, separators=(",", ":"))
+    return Response(content, media_type="application/json")
@@ -0,0 +1,146 @@
+import inspect
+import secrets
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dtime
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from utils import shared
+from utils.cache import CACHE_TTL_SECONDS, SCOPES, response_cache
+
+# Requisições condicionais (ETag / Last-Modified / 304) nas rotas de leitura.
+# Escopos "live" e "history" usam a marca d'água do cache de respostas, que muda
+# a cada leitura gravada; "day" depende só da data (dados do sol). A marca é
+# por processo, então a ETag leva um identificador do processo: com vários
+# workers uma revalidação em outro processo apenas devolve 200. Gravações feitas
+# fora da API (manager.py) não mudam a marca; o intervalo de CACHE_TTL_SECONDS
+# entra na ETag para limitar essa defasagem, como no cache de respostas.
+_PROCESS = secrets.token_hex(4)
+
+
+def _seconds_to_midnight() -> int:
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), dtime.min)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, dtime.min).astimezone(timezone.utc)
+
+
+def _validators(request: Request, scope: str, max_age: int, until_midnight: bool):
+    today = date.today()
+    accept = zlib.crc32(request.headers.get("accept", "").encode())
+    if scope in SCOPES:
+        # Leituras de outros workers precisam mover a marca antes de compará-la
+        shared.sync()
+        mark, last_modified = response_cache.version(scope)
+        window = int(time.time() // CACHE_TTL_SECONDS) if CACHE_TTL_SECONDS else 0
+        tag = f"{_PROCESS}-{mark}-{window:x}-{accept:x}"
+        # Last-Modified acompanha o que a ETag leva: o início do intervalo (e, no
+        # histórico, o dia), para que If-Modified-Since também expire com eles
+        starts = [datetime.fromtimestamp(window * CACHE_TTL_SECONDS, timezone.utc)]
+        if scope == "history":
+            tag += f"-{today:%Y%m%d}"
+            starts.append(_midnight(today))
+        last_modified = max(last_modified, *starts)
+    else:
+        tag = f"{today:%Y%m%d}-{accept:x}"
+        last_modified = _midnight(today)
+
+    if until_midnight:
+        max_age = min(max_age, _seconds_to_midnight())
+    return {
+        "ETag": f'W/"{tag}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": f"max-age={max_age}" if max_age else "no-cache",
+        "Vary": "Accept",
+    }
+
+
+def _not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Resolução de segundos: uma data do segundo atual pode preceder uma gravação
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since < now
+
+
+def conditional(scope: str = "live", max_age: int = 0, until_midnight=False):
+    """Responde 304 antes de executar o endpoint quando o cliente já tem a versão.
+
+    Fica acima de `cached` para que nem o cache nem o banco sejam consultados.
+    `max_age` (segundos) vira Cache-Control; 0 pede revalidação a cada uso.
+    Com `until_midnight`, a validade termina à meia-noite ("hoje" muda).
+    """
+    if scope not in SCOPES + ("day",):
+        raise ValueError(f"Unknown conditional scope: {scope}")
+
+    def decorator(func):
+        async def validators(request: Request) -> dict:
+            # Dependência resolvida antes das do endpoint (sessão do banco)
+            headers = _validators(request, scope, max_age, until_midnight)
+            if _not_modified(request, headers):
+                raise HTTPException(304, headers=headers)
+            return headers
+
+        def after(result, response, headers):
+            if not isinstance(result, Response):
+                response.headers.update(headers)
+                return result
+            # Endpoints que devolvem Response (ex.: formato colunar) não recebem
+            # os cabeçalhos do `response` injetado; a Response pode vir de
+            # `cached` e ser compartilhada entre requisições, então vai uma cópia
+            copy = Response(
+                result.body,
+                status_code=result.status_code,
+                background=result.background,
+            )
+            copy.raw_headers = list(result.raw_headers)
+            copy.headers.update(headers)
+            return copy
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*, _validators, _response, **kwargs):
+                return after(await func(**kwargs), _response, _validators)
+
+            wrapper = async_wrapper
+        else:
+
+            @wraps(func)
+            def sync_wrapper(*, _validators, _response, **kwargs):
+                return after(func(**kwargs), _response, _validators)
+
+            wrapper = sync_wrapper
+
+        keyword = inspect.Parameter.KEYWORD_ONLY
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                inspect.Parameter(
+                    "_validators", keyword, default=Depends(validators), annotation=dict
+                ),
+                *(p.replace(kind=keyword) for p in signature.parameters.values()),
+                inspect.Parameter("_response", keyword, annotation=Response),
+            ]
+        )
+        return wrapper
+
+    return decorator
@@ -1,26 +1,26 @@
+import csv
 import io
 
-import pandas as pd
 from fastapi.responses import StreamingResponse
 
 
-def convert_to_df(data: list[dict]):
-    return pd.DataFrame(data)
+async def aiter_csv(chunks, columns: list[str]):
+    """Gera o CSV em pedaços, um por lote de linhas, sem materializar o resultado."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    async for chunk in chunks:
+        writer.writerows([row[c] for c in columns] for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
 
 
-def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    """Converte DataFrame para bytes de CSV."""
-    buffer = io.BytesIO()
-    df.to_csv(buffer, index=False)
-    buffer.seek(0)  # Volte ao início do buffer
-    return buffer
-
-
-def get_csv_bytes(data: list[dict], filename: str = "data.csv"):
-    df = convert_to_df(data)
-    df_bytes = df_to_csv_bytes(df)
+def get_csv_stream(chunks, columns: list[str], filename: str = "data.csv"):
     return StreamingResponse(
-        content=df_bytes,
+        content=aiter_csv(chunks, columns),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
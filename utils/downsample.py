@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from fastapi import Query
+
+# Redução de séries temporais no servidor sobre as linhas (ordenadas por
+# timestamp). Os buckets são definidos por tempo, entre a primeira e a última
+# linha: com dados só em parte da janela, os pontos não se perdem nos vazios.
+
+FIELDS = ("temperature", "humidity")
+MODES = ("lttb", "minmax")
+
+POINTS_QUERY = Query(
+    None, ge=3, le=10000, description="Reduz a série a no máximo N pontos"
+)
+MODE_QUERY = Query("lttb", pattern="^(lttb|minmax)$")
+
+
+def _grouped(rows, start: datetime, end: datetime, buckets: int):
+    """Agrupa linhas consecutivas pelo índice do bucket de tempo."""
+    width = max((end - start).total_seconds() / buckets, 1e-9)
+    key, group = None, []
+    for row in rows:
+        idx = int((row["timestamp"] - start).total_seconds() // width)
+        idx = min(max(idx, 0), buckets - 1)
+        if idx != key and group:
+            yield group
+            group = []
+        key = idx
+        group.append(row)
+    if group:
+        yield group
+
+
+def _point(row, origin: datetime):
+    return (
+        (row["timestamp"] - origin).total_seconds(),
+        [float(row[f]) for f in FIELDS],
+    )
+
+
+def _average(group, origin: datetime):
+    n = len(group)
+    t = sum((r["timestamp"] - origin).total_seconds() for r in group) / n
+    return t, [sum(float(r[f]) for r in group) / n for f in FIELDS]
+
+
+def _largest_triangle(group, a, c, origin: datetime):
+    ta, ya = a
+    tc, yc = c
+    best, best_area = group[0], -1.0
+    for row in group:
+        tb, yb = _point(row, origin)
+        # Soma das áreas nas duas séries para preservar o formato de ambas
+        area = sum(
+            abs((ta - tc) * (yb[i] - ya[i]) - (ta - tb) * (yc[i] - ya[i]))
+            for i in range(len(FIELDS))
+        )
+        if area > best_area:
+            best, best_area = row, area
+    return best
+
+
+def lttb(rows, points: int, start: datetime, end: datetime):
+    """Largest-Triangle-Three-Buckets sobre buckets de tempo."""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    yield first
+    origin = first["timestamp"]
+    a = _point(first, origin)
+
+    pending = None
+    for group in _grouped(rows, start, end, max(points - 2, 1)):
+        if pending is not None:
+            chosen = _largest_triangle(pending, a, _average(group, origin), origin)
+            yield chosen
+            a = _point(chosen, origin)
+        pending = group
+
+    if pending is None:
+        return
+    # A última linha é sempre mantida; sai do último bucket
+    last = pending.pop()
+    if pending:
+        yield _largest_triangle(pending, a, _point(last, origin), origin)
+    yield last
+
+
+def minmax(rows, points: int, start: datetime, end: datetime):
+    """Mantém, em cada bucket, as linhas com mínimo e máximo de cada série."""
+    picks = [(pick, f) for f in FIELDS for pick in (min, max)]
+    buckets = max(points // len(picks), 1)
+    # Com menos pontos que escolhas por bucket, só as primeiras cabem
+    picks = picks[:points]
+    for group in _grouped(rows, start, end, buckets):
+        keep = {}
+        for pick, f in picks:
+            row = pick(group, key=lambda r: float(r[f]))
+            keep[id(row)] = row
+        yield from sorted(keep.values(), key=lambda r: r["timestamp"])
+
+
+def downsample(rows, points: int | None, mode="lttb"):
+    """Devolve as linhas reduzidas a no máximo `points` (ou todas, se None)."""
+    rows = list(rows)
+    if points is None or len(rows) <= points:
+        return [dict(r) for r in rows]
+    # Bordas dos buckets a partir dos dados, não da janela pedida
+    start, end = rows[0]["timestamp"], rows[-1]["timestamp"]
+    reducer = lttb if mode == "lttb" else minmax
+    return [dict(r) for r in reducer(rows, points, start, end)]
@@ -0,0 +1,156 @@
+import math
+from collections import Counter
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from database.models.entities.rollups import DailyHistogram
+from utils.stations import DEFAULT_STATION, station_clause
+from utils.upsert import upsert
+
+# Histogramas diários de faixas fixas, mantidos a cada inserção junto com os
+# agregados. Somar as contagens de vários dias é exato (o histograma da janela),
+# e os percentis saem dele com erro de no máximo uma faixa: 0,1 °C e 0,5 %.
+
+# métrica -> (coluna em `readings`, faixas por unidade)
+METRICS = {"temp": ("temperature", 10), "hum": ("humidity", 2)}
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# Limite superior fechado: 100 % de umidade cai na última faixa, não em 100–100,5
+UPPER_LIMITS = {"hum": 100}
+
+_REBUILD_PART = """
+    SELECT station_id, local_date, '{metric}', FLOOR({column} * {scale}), COUNT(*)
+    FROM readings
+    WHERE timestamp >= :since
+    GROUP BY station_id, local_date, FLOOR({column} * {scale})
+"""
+
+_BINS = """
+    SELECT metric, bin, SUM(count) AS count
+    FROM readings_histogram_daily
+    WHERE day >= :start AND day <= :end{station}
+    GROUP BY metric, bin
+    ORDER BY metric, bin
+"""
+
+
+@lru_cache(maxsize=None)
+def _bins_sql(per_station: bool):
+    return text(
+        _BINS.format(station=station_clause(DEFAULT_STATION if per_station else None))
+    )
+
+
+def count(bins: Counter, station: str, day: date, temperature: float, humidity: float):
+    """Acumula uma leitura em `bins` (chave: estação, dia, métrica, faixa)."""
+    bins[(station, day, "temp", math.floor(temperature * METRICS["temp"][1]))] += 1
+    bins[(station, day, "hum", math.floor(humidity * METRICS["hum"][1]))] += 1
+
+
+def store(session, bins: Counter):
+    """Soma as contagens acumuladas por `count` na tabela (mesma transação)."""
+    if not bins:
+        return
+    session.execute(
+        upsert(session.get_bind().dialect.name, DailyHistogram.__table__, ("count",)),
+        [
+            {"station_id": k[0], "day": k[1], "metric": k[2], "bin": k[3], "count": n}
+            for k, n in bins.items()
+        ],
+    )
+
+
+def rebuild(conn, since: datetime):
+    """Recalcula os histogramas dos dias inteiros a partir de `since`.
+
+    O dia parcialmente compactado (antes do limite) é mantido como está.
+    """
+    first_day = since.date()
+    if datetime.combine(first_day, datetime.min.time()) < since:
+        first_day += timedelta(days=1)
+    since = datetime.combine(first_day, datetime.min.time())
+    conn.execute(
+        text("DELETE FROM readings_histogram_daily WHERE day >= :day"),
+        {"day": first_day},
+    )
+    parts = " UNION ALL ".join(
+        _REBUILD_PART.format(metric=metric, column=column, scale=scale)
+        for metric, (column, scale) in METRICS.items()
+    )
+    conn.execute(
+        text(
+            "INSERT INTO readings_histogram_daily (station_id, day, metric, bin, count)"
+            + parts
+        ),
+        {"since": since},
+    )
+
+
+def window_bins(session, start: date, end: date, station: str | None = None):
+    """Faixas finas de cada métrica nos dias [start, end]: {métrica: [(faixa, n)]}."""
+    query = _bins_sql(bool(station))
+    params = {"start": start, "end": end, "station": station}
+    bins = {metric: [] for metric in METRICS}
+    for row in session.execute(query, params):
+        bin_ = int(row.bin)
+        upper = UPPER_LIMITS.get(row.metric)
+        if upper is not None:
+            last = upper * METRICS[row.metric][1] - 1
+            if bin_ > last:
+                if bins[row.metric] and bins[row.metric][-1][0] == last:
+                    bins[row.metric][-1] = (
+                        last,
+                        bins[row.metric][-1][1] + int(row.count),
+                    )
+                    continue
+                bin_ = last
+        bins[row.metric].append((bin_, int(row.count)))
+    return bins
+
+
+def bin_step(metric: str, width: float) -> int:
+    """Faixas finas por faixa de `width`; ValueError se não for múltiplo."""
+    scale = METRICS[metric][1]
+    step = round(width * scale)
+    if step < 1 or abs(width * scale - step) > 1e-9:
+        raise ValueError(
+            f"{METRICS[metric][0]} bin width must be a multiple of {1 / scale:g}"
+        )
+    return step
+
+
+def percentiles(bins, metric: str, qs=DEFAULT_PERCENTILES) -> dict:
+    """Percentis interpolados linearmente dentro da faixa (bins em ordem)."""
+    scale = METRICS[metric][1]
+    total = sum(n for _, n in bins)
+    result = {}
+    for q in qs:
+        if not total:
+            result[f"p{q}"] = None
+            continue
+        target, seen = total * q / 100, 0
+        for bin_, n in bins:
+            if seen + n >= target:
+                value = (bin_ + (target - seen) / n) / scale
+                break
+            seen += n
+        result[f"p{q}"] = round(value, 2)
+    return result
+
+
+def histogram(bins, metric: str, width: float) -> list[dict]:
+    """Reagrupa as faixas finas em faixas de `width` (múltiplo da resolução)."""
+    scale = METRICS[metric][1]
+    step = bin_step(metric, width)
+    coarse = Counter()
+    for bin_, n in bins:
+        coarse[bin_ // step] += n
+    return [
+        {
+            "from": round(k * step / scale, 2),
+            "to": round((k + 1) * step / scale, 2),
+            "count": n,
+        }
+        for k, n in sorted(coarse.items())
+    ]
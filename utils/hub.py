@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+# Eventos pendentes por cliente; quem acumula mais que isso é desconectado
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class ReadingHub:
+    """Distribui novas leituras para os clientes conectados em /readings/stream.
+
+    `publish` pode ser chamado de qualquer thread (rotas síncronas, thread de
+    ingestão); a entrega às filas acontece no event loop da aplicação.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._loop = None
+        # fila do cliente -> estação filtrada (None = todas)
+        self._subscribers: dict[asyncio.Queue, str | None] = {}
+        self.published = 0
+        self.evicted = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, station: str | None = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[queue] = station
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def publish(self, reading):
+        if self._loop is None or self._loop.is_closed():
+            return
+        # Serializa uma vez só, independente do número de clientes
+        data = jsonable_encoder(reading)
+        payload = json.dumps(data)
+        self._loop.call_soon_threadsafe(self._fanout, data.get("station_id"), payload)
+
+    def publish_newest(self, readings):
+        """Publica a leitura mais recente de cada estação de um lote."""
+        newest = {}
+        for reading in readings:
+            station = reading.get("station_id")
+            if (
+                station not in newest
+                or reading["timestamp"] > newest[station]["timestamp"]
+            ):
+                newest[station] = reading
+        for reading in newest.values():
+            self.publish(reading)
+
+    def _fanout(self, station: str | None, payload: str):
+        self.published += 1
+        for queue, wanted in list(self._subscribers.items()):
+            if wanted is not None and wanted != station:
+                continue
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._evict(queue)
+
+    def _evict(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+        self.evicted += 1
+        while not queue.empty():
+            queue.get_nowait()
+        # None sinaliza ao gerador do cliente que a conexão deve ser encerrada
+        queue.put_nowait(None)
+
+
+reading_hub = ReadingHub()
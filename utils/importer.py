@@ -0,0 +1,154 @@
+import csv
+import gzip
+import math
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, text
+
+from database.configs.database import SessionLocal, get_engine
+from utils import retention
+from utils.ingest import insert_readings
+from utils.stations import DEFAULT_STATION, STATION_PATTERN
+
+# Importação em lote do CSV gerado por GET /api/readings/file (timestamp,
+# temperature, humidity e, opcionalmente, station_id). O arquivo é lido em
+# fluxo e gravado em transações de IMPORT_BATCH_ROWS linhas, com memória
+# constante; leituras que já existem (mesma estação e timestamp) são puladas,
+# então repetir ou retomar uma importação interrompida é seguro. Linhas antes da
+# marca d'água de compactação também são puladas: a exportação traz ali médias
+# horárias, que já estão nos agregados e seriam somadas de novo.
+IMPORT_BATCH_ROWS = 5000
+PROGRESS_SECONDS = 5
+MAX_REPORTED_ERRORS = 10
+
+REQUIRED_COLUMNS = ("timestamp", "temperature", "humidity")
+_STATION = re.compile(STATION_PATTERN)
+
+_EXISTING = (
+    text(
+        """
+        SELECT station_id, timestamp FROM readings
+        WHERE timestamp >= :start AND timestamp < :end
+          AND station_id IN :stations
+        """
+    )
+    .bindparams(bindparam("stations", expanding=True))
+    .columns(timestamp=DateTime)
+)
+
+
+def _open(path: str):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def _parse(record: dict, station: str, whole_seconds: bool) -> dict:
+    timestamp = datetime.fromisoformat(record["timestamp"].strip())
+    # Mesma normalização das rotas: horário local sem timezone
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    if whole_seconds and timestamp.microsecond:
+        # DATETIME sem fração arredonda; compara com o valor que será gravado
+        timestamp = (timestamp + timedelta(microseconds=500000)).replace(microsecond=0)
+    temperature = float(record["temperature"])
+    humidity = float(record["humidity"])
+    if not (math.isfinite(temperature) and math.isfinite(humidity)):
+        raise ValueError("temperature and humidity must be finite numbers")
+    station = (record.get("station_id") or "").strip() or station
+    if not _STATION.match(station):
+        raise ValueError(f"invalid station_id {station!r}")
+    return {
+        "timestamp": timestamp,
+        "temperature": temperature,
+        "humidity": humidity,
+        "station_id": station,
+    }
+
+
+def _batches(reader, station, whole_seconds, batch_size, stats, errors):
+    batch = []
+    for line, record in enumerate(reader, start=2):
+        stats["read"] += 1
+        try:
+            batch.append(_parse(record, station, whole_seconds))
+        except (KeyError, TypeError, ValueError) as e:
+            stats["invalid"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {line}: {e}")
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _new_rows(session, batch: list[dict]) -> list[dict]:
+    """Linhas do lote que ainda não estão no banco (nem repetidas no lote)."""
+    unique = {}
+    for row in batch:
+        unique.setdefault((row["station_id"], row["timestamp"]), row)
+    params = {
+        "start": min(key[1] for key in unique),
+        "end": max(key[1] for key in unique) + timedelta(seconds=1),
+        "stations": sorted({key[0] for key in unique}),
+    }
+    existing = {tuple(row) for row in session.execute(_EXISTING, params)}
+    return [row for key, row in unique.items() if key not in existing]
+
+
+def import_csv(
+    path: str,
+    station: str = DEFAULT_STATION,
+    batch_size: int = IMPORT_BATCH_ROWS,
+    report=print,
+) -> dict:
+    """Importa o CSV (`-` = entrada padrão, `.gz` descomprimido em fluxo)."""
+    engine = get_engine()
+    whole_seconds = engine.dialect.name in ("mysql", "mariadb")
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "compacted": 0}
+    errors = []
+    started = last_report = time.monotonic()
+
+    with _open(path) as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"missing CSV columns: {', '.join(missing)}")
+
+        session = SessionLocal()
+        try:
+            compacted_until = retention.watermark(session)
+            for batch in _batches(
+                reader, station, whole_seconds, batch_size, stats, errors
+            ):
+                if compacted_until is not None:
+                    read = len(batch)
+                    batch = [r for r in batch if r["timestamp"] >= compacted_until]
+                    stats["compacted"] += read - len(batch)
+                rows = _new_rows(session, batch) if batch else []
+                insert_readings(session, rows)
+                session.commit()
+                stats["inserted"] += len(rows)
+                stats["duplicates"] += len(batch) - len(rows)
+
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_SECONDS:
+                    last_report = now
+                    rate = stats["read"] / (now - started)
+                    report(
+                        f"{stats['read']} rows read, {stats['inserted']} inserted, "
+                        f"{stats['duplicates']} duplicates ({rate:,.0f} rows/s)"
+                    )
+        finally:
+            session.close()
+
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    stats["errors"] = errors
+    return stats
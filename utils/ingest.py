@@ -0,0 +1,229 @@
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from database.configs.database import SessionLocal
+from database.models.entities.readings import Readings
+from utils.cache import response_cache
+from utils.hub import reading_hub
+from utils.latest import latest_reading
+from utils.rollups import apply_readings
+from utils.shared import shared_ring
+
+# "direct": cada POST grava e faz commit na própria requisição (padrão).
+# "buffered": leituras vão para uma fila em memória e são gravadas em lote.
+INGEST_MODE = os.getenv("INGEST_MODE", "direct")
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+INGEST_FLUSH_ROWS = int(os.getenv("INGEST_FLUSH_ROWS", "500"))
+INGEST_FLUSH_MS = int(os.getenv("INGEST_FLUSH_MS", "200"))
+# Espera entre tentativas de um lote que falhou por erro transitório do banco
+# (dobra a cada falha até o máximo)
+INGEST_RETRY_MS = int(os.getenv("INGEST_RETRY_MS", "500"))
+INGEST_RETRY_MAX_MS = int(os.getenv("INGEST_RETRY_MAX_MS", "30000"))
+
+
+def insert_readings(session, rows: list[dict]):
+    """Insere várias leituras em INSERTs multi-linhas.
+
+    Com executemany o SQLAlchemy agrupa as linhas em lotes (insertmanyvalues)
+    reaproveitando a instrução compilada, em vez de montar um VALUES novo a cada
+    chamada.
+
+    Todas as linhas precisam trazer `timestamp`, para que os agregados possam
+    ser atualizados sem reler as linhas do banco. Não faz commit.
+    """
+    if not rows:
+        return
+    session.execute(insert(Readings.__table__), rows)
+    apply_readings(session, rows)
+
+
+class IngestBuffer:
+    """Fila limitada com uma thread que grava as leituras em lote (group commit)."""
+
+    def __init__(
+        self,
+        session_factory,
+        max_size: int,
+        flush_rows: int,
+        flush_ms: int,
+        retry_ms: int = INGEST_RETRY_MS,
+        retry_max_ms: int = INGEST_RETRY_MAX_MS,
+    ):
+        self._session_factory = session_factory
+        self._queue = queue.Queue(maxsize=max_size)
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_ms / 1000.0
+        self._retry_interval = retry_ms / 1000.0
+        self._retry_max = retry_max_ms / 1000.0
+        # Lote já aceito (202) que falhou e aguarda nova tentativa
+        self._pending: list[dict] = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.retries = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-buffer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread e grava o que ainda estiver na fila."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._drain()
+
+    def submit(self, row: dict) -> bool:
+        """Enfileira uma leitura; devolve False se a fila estiver cheia."""
+        # O lote aguardando nova tentativa também ocupa a capacidade da fila
+        full = self._queue.qsize() + len(self._pending) >= self._queue.maxsize
+        if not full:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                full = True
+        if full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _take_batch(self) -> list[dict]:
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._flush_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        delay = self._retry_interval
+        while not self._stop.is_set():
+            batch = self._pending or self._take_batch()
+            if not batch:
+                continue
+            if self._flush(batch):
+                self._pending = []
+                delay = self._retry_interval
+            else:
+                # Mantém o lote (já confirmado ao cliente) e tenta de novo
+                self._pending = batch
+                self._stop.wait(delay)
+                delay = min(delay * 2, self._retry_max)
+
+    def _drain(self):
+        # Encerrando: uma última tentativa para o lote pendente e a fila
+        batch, self._pending = self._pending, []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self._flush_rows:
+                self._flush_or_drop(batch)
+                batch = []
+        if batch:
+            self._flush_or_drop(batch)
+
+    def _flush_or_drop(self, rows: list[dict]):
+        if not self._flush(rows):
+            with self._lock:
+                self.failed_rows += len(rows)
+
+    def _flush(self, rows: list[dict]) -> bool:
+        """Grava o lote; False se falhou por erro transitório (tentar de novo).
+
+        Erros que uma nova tentativa não resolve (dados recusados pelo banco)
+        descartam o lote e contam em `failed_rows`.
+        """
+        started = time.perf_counter()
+        session = self._session_factory()
+        try:
+            insert_readings(session, rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            transient = isinstance(e, (OperationalError, InterfaceError)) or getattr(
+                e, "connection_invalidated", False
+            )
+            print(
+                f"Error in ingest flush ({len(rows)} rows"
+                f"{', will retry' if transient else ''}): {e}"
+            )
+            with self._lock:
+                if transient:
+                    self.retries += 1
+                else:
+                    self.failed_rows += len(rows)
+            return not transient
+        finally:
+            session.close()
+
+        # Depois do commit: uma falha aqui não pode fazer o lote ser regravado
+        try:
+            latest_reading.offer(rows)
+            if shared_ring is not None:
+                shared_ring.append(rows)
+            response_cache.bump(r["timestamp"] for r in rows)
+            reading_hub.publish_newest(rows)
+        except Exception as e:
+            print(f"Error publishing ingested readings: {e}")
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.flushes += 1
+            self.flushed_rows += len(rows)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "failed_rows": self.failed_rows,
+                "pending_rows": len(self._pending),
+                "retries": self.retries,
+                "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+                "max_flush_ms": round(self.max_flush_seconds * 1000, 3),
+                "avg_flush_ms": round(self.total_flush_seconds / self.flushes * 1000, 3)
+                if self.flushes
+                else 0.0,
+            }
+
+
+ingest_buffer = (
+    IngestBuffer(SessionLocal, INGEST_QUEUE_SIZE, INGEST_FLUSH_ROWS, INGEST_FLUSH_MS)
+    if INGEST_MODE == "buffered"
+    else None
+)
@@ -0,0 +1,87 @@
+import threading
+
+from sqlalchemy import DateTime, text
+
+from database.configs.database import SessionLocal
+from utils.stations import DEFAULT_STATION
+
+_STATIONS_QUERY = text("""
+                    SELECT DISTINCT station_id
+                    FROM readings
+                     """)
+
+# Uma busca no índice (station_id, timestamp) por estação
+_LATEST_QUERY = text("""
+                    SELECT temperature, humidity, timestamp, station_id
+                    FROM readings
+                    WHERE station_id = :station
+                    ORDER BY timestamp DESC
+                    LIMIT 1
+                     """).columns(timestamp=DateTime)
+
+_FIELDS = ("temperature", "humidity", "timestamp", "station_id")
+
+
+class LatestReading:
+    """Leitura mais recente de cada estação, mantida em memória.
+
+    Carregada do banco uma única vez (na inicialização ou no primeiro acesso) e
+    depois atualizada por quem insere leituras, sem consultar o banco.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_station: dict[str, dict] = {}
+        self._newest = None
+        self._loaded = False
+
+    def load(self):
+        session = SessionLocal()
+        try:
+            stations = session.execute(_STATIONS_QUERY).scalars().all()
+            rows = [
+                session.execute(_LATEST_QUERY, {"station": s}).mappings().first()
+                for s in stations
+            ]
+        finally:
+            session.close()
+        with self._lock:
+            for row in rows:
+                if row is not None:
+                    self._offer(row)
+            self._loaded = True
+
+    def get(self, station: str | None = None) -> dict | None:
+        if not self._loaded:
+            self.load()
+        if station is None:
+            return self._newest
+        return self._by_station.get(station)
+
+    def stations(self) -> list[dict]:
+        if not self._loaded:
+            self.load()
+        return sorted(self._by_station.values(), key=lambda r: r["station_id"])
+
+    def offer(self, readings):
+        """Registra leituras recém-gravadas; só a mais nova substitui a atual."""
+        with self._lock:
+            for reading in readings:
+                self._offer(reading)
+
+    def _offer(self, reading):
+        if hasattr(reading, "keys"):
+            value = {k: reading.get(k) for k in _FIELDS}
+        else:
+            value = {k: getattr(reading, k, None) for k in _FIELDS}
+        value["station_id"] = value["station_id"] or DEFAULT_STATION
+
+        # Troca o dicionário inteiro: leitores nunca veem um valor pela metade
+        current = self._by_station.get(value["station_id"])
+        if current is None or value["timestamp"] >= current["timestamp"]:
+            self._by_station[value["station_id"]] = value
+        if self._newest is None or value["timestamp"] >= self._newest["timestamp"]:
+            self._newest = value
+
+
+latest_reading = LatestReading()
@@ -1,5 +1,11 @@
+import calendar
 import math
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 def calculate_eto(temp_celsius, humidity_percent):
@@ -31,6 +37,22 @@ def calculate_eto(temp_celsius, humidity_percent):
         return 0.0
 
 
+def calculate_eto_array(temp_celsius, humidity_percent) -> "np.ndarray":
+    """
+    Versão vetorizada de `calculate_eto`: recebe sequências (ou arrays) de
+    temperatura média e umidade relativa e devolve a ETo (mm/dia) de cada par
+    """
+    # numpy pesa na inicialização do app: importado só no primeiro cálculo
+    import numpy as np
+
+    temp = np.asarray(temp_celsius, dtype=float)
+    humidity = np.asarray(humidity_percent, dtype=float)
+    humidity_factor = 1.0 - (humidity / 100.0) * 0.3
+    eto = 0.27 * (0.46 * temp + 8.13) * humidity_factor
+    # Valores inválidos (NaN) viram 0, como no cálculo escalar
+    return np.clip(np.nan_to_num(eto, nan=0.0), 0, 15)
+
+
 # Localização fixa (poderia futuramente vir de config ou DB)
 LATITUDE = -23.1867  # Exemplo: Botucatu / SP proximidade
 LONGITUDE = -48.9870
@@ -42,34 +64,39 @@ def _julian_day(d: date) -> float:
     return d.toordinal() + 1721424.5
 
 
-def _solar_positions(d: date):
-    jd = _julian_day(d)
+def _solar_arrays(days):
+    """
+    Posição solar (NOAA simplificado) para um array de dias de uma só vez
+    (ordinais de `date.toordinal()`). Devolve trânsito solar (Julian Day),
+    declinação (rad) e cosseno do ângulo horário do nascer/pôr do sol
+    """
+    import numpy as np
+
+    jd = np.asarray(days, dtype=float) + 1721424.5
     n = jd - 2451545.0 + 0.0008
     J_star = n - (LONGITUDE / 360.0)
     M = (357.5291 + 0.98560028 * J_star) % 360
-    M_rad = math.radians(M)
-    C = (
-        1.9148 * math.sin(M_rad)
-        + 0.02 * math.sin(2 * M_rad)
-        + 0.0003 * math.sin(3 * M_rad)
-    )
+    M_rad = np.radians(M)
+    C = 1.9148 * np.sin(M_rad) + 0.02 * np.sin(2 * M_rad) + 0.0003 * np.sin(3 * M_rad)
     lambda_sun = (M + 102.9372 + C + 180) % 360
-    lambda_rad = math.radians(lambda_sun)
+    lambda_rad = np.radians(lambda_sun)
     J_transit = (
-        2451545.0
-        + J_star
-        + 0.0053 * math.sin(M_rad)
-        - 0.0069 * math.sin(2 * lambda_rad)
+        2451545.0 + J_star + 0.0053 * np.sin(M_rad) - 0.0069 * np.sin(2 * lambda_rad)
     )
 
     # Declinação solar
-    delta = math.asin(math.sin(lambda_rad) * math.sin(math.radians(23.44)))
+    delta = np.arcsin(np.sin(lambda_rad) * math.sin(math.radians(23.44)))
 
     # Ângulo horário do nascer / pôr do sol (assumindo -0.83° refração + raio solar)
     cos_omega = (
-        math.sin(math.radians(-0.83))
-        - math.sin(math.radians(LATITUDE)) * math.sin(delta)
-    ) / (math.cos(math.radians(LATITUDE)) * math.cos(delta))
+        math.sin(math.radians(-0.83)) - math.sin(math.radians(LATITUDE)) * np.sin(delta)
+    ) / (math.cos(math.radians(LATITUDE)) * np.cos(delta))
+
+    return J_transit, delta, cos_omega
+
+
+def _solar_positions(d: date):
+    J_transit, _, cos_omega = (float(v[0]) for v in _solar_arrays([d.toordinal()]))
 
     if cos_omega <= -1:
         # Sol 24h acima
@@ -86,6 +113,49 @@ def _solar_positions(d: date):
     return J_rise, J_set, (2 * omega / 15.0)  # duração em horas
 
 
+def extraterrestrial_radiation(days) -> "np.ndarray":
+    """
+    Radiação extraterrestre diária Ra (MJ m-2 dia-1) na latitude da estação,
+    conforme FAO-56 (eq. 21), usando a declinação calculada em `_solar_arrays`
+    """
+    import numpy as np
+
+    ordinals = np.array([d.toordinal() for d in days], dtype=float)
+    day_of_year = np.array([d.timetuple().tm_yday for d in days], dtype=float)
+    _, delta, _ = _solar_arrays(ordinals)
+
+    phi = math.radians(LATITUDE)
+    # Distância relativa Terra-Sol e ângulo horário do pôr do sol (horizonte geométrico)
+    dr = 1 + 0.033 * np.cos(2 * math.pi * day_of_year / 365)
+    ws = np.arccos(np.clip(-math.tan(phi) * np.tan(delta), -1, 1))
+    gsc = 0.0820  # constante solar, MJ m-2 min-1
+    return (
+        (24 * 60 / math.pi)
+        * gsc
+        * dr
+        * (
+            ws * math.sin(phi) * np.sin(delta)
+            + math.cos(phi) * np.cos(delta) * np.sin(ws)
+        )
+    )
+
+
+def hargreaves_eto(days, temp_min, temp_max, temp_mean=None) -> "np.ndarray":
+    """
+    ETo diária (mm/dia) pelo método de Hargreaves-Samani, a partir das
+    temperaturas mínima e máxima do dia e da radiação extraterrestre
+    """
+    import numpy as np
+
+    tmin = np.asarray(temp_min, dtype=float)
+    tmax = np.asarray(temp_max, dtype=float)
+    tmean = (tmin + tmax) / 2 if temp_mean is None else np.asarray(temp_mean, float)
+    # 0.408 converte MJ m-2 dia-1 em mm/dia de água evaporada
+    ra_mm = 0.408 * extraterrestrial_radiation(days)
+    eto = 0.0023 * (tmean + 17.8) * np.sqrt(np.clip(tmax - tmin, 0, None)) * ra_mm
+    return np.clip(np.nan_to_num(eto, nan=0.0), 0, 15)
+
+
 def _julian_to_datetime(j: float) -> datetime:
     # Conversão Julian Day para datetime UTC
     # Fonte: simplificada
@@ -103,6 +173,12 @@ def _format_time(dt: datetime | None) -> str:
     return dt.strftime("%H:%M")
 
 
+# Quantidade de dias/anos de efemérides mantidos em memória
+EPHEMERIS_CACHE_DAYS = 4096
+EPHEMERIS_CACHE_YEARS = 32
+
+
+@lru_cache(maxsize=EPHEMERIS_CACHE_DAYS)
 def _day_payload(d: date):
     J_rise, J_set, daylight_hours = _solar_positions(d)
     if J_rise is None and J_set is None:
@@ -127,3 +203,55 @@ def _day_payload(d: date):
         "day_length_hours": daylight_hours,
         "day_length_human": f"{daylight_hours:.2f} h",
     }
+
+
+def _julian_to_local_hm(j: "np.ndarray") -> list[str]:
+    import numpy as np
+
+    # Minutos do dia no fuso local, truncados como em `_format_time`
+    seconds = (j - 2440587.5) * 86400.0 + TIMEZONE_OFFSET * 3600
+    minutes = (np.floor(seconds / 60) % 1440).astype(int)
+    return [f"{m // 60:02d}:{m % 60:02d}" for m in minutes.tolist()]
+
+
+@lru_cache(maxsize=EPHEMERIS_CACHE_YEARS)
+def _ephemeris_year(year: int) -> tuple[dict, ...]:
+    """
+    Nascer, pôr do sol e duração do dia para todos os dias de um ano,
+    calculados em uma única passada vetorizada
+    """
+    import numpy as np
+
+    first = date(year, 1, 1)
+    # Sem date(year + 1, 1, 1): o ano 9999 é o último que `date` representa
+    count = 366 if calendar.isleap(year) else 365
+    ordinals = np.arange(first.toordinal(), first.toordinal() + count)
+    J_transit, _, cos_omega = _solar_arrays(ordinals)
+
+    omega = np.degrees(np.arccos(np.clip(cos_omega, -1, 1)))
+    rise_hm = _julian_to_local_hm(J_transit - omega / 360.0)
+    set_hm = _julian_to_local_hm(J_transit + omega / 360.0)
+    day_length = (2 * omega / 15.0).tolist()
+    polar = ((cos_omega <= -1) | (cos_omega >= 1)).tolist()
+
+    return tuple(
+        {
+            "date": (first + timedelta(days=i)).isoformat(),
+            "sunrise_hm": None if polar[i] else rise_hm[i],
+            "sunset_hm": None if polar[i] else set_hm[i],
+            "day_length_hours": day_length[i],
+        }
+        for i in range(count)
+    )
+
+
+def ephemeris_range(start: date, end: date) -> list[dict]:
+    """Efemérides de start a end (inclusive), lidas das tabelas anuais."""
+    days = []
+    for year in range(start.year, end.year + 1):
+        table = _ephemeris_year(year)
+        first = date(year, 1, 1)
+        lo = (start - first).days if year == start.year else 0
+        hi = (end - first).days + 1 if year == end.year else len(table)
+        days.extend(table[lo:hi])
+    return days
@@ -0,0 +1,283 @@
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Métricas no formato texto do Prometheus, sem dependências externas.
+# Rotas HTTP, consultas SQL e espera por conexão do pool são rotuladas pela rota
+# que as originou, para saber qual endpoint está ocupando o pool.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+ROWS_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Escopo ASGI da requisição em andamento (o roteador preenche scope["route"])
+_request_scope: ContextVar[dict | None] = ContextVar("request_scope", default=None)
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+`?(\w+)", re.IGNORECASE)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels=()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = self._header()
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = _labels(names, labels + (bound,))
+                    lines.append(f"{self.name}_bucket{le} {bucket_count}")
+                inf = _labels(names, labels + ("+Inf",))
+                lines.append(f"{self.name}_bucket{inf} {count}")
+                base = _labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{base} {total}")
+                lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response is fully sent",
+    ("method", "route"),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by status code", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method",)
+)
+SQL_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ("engine", "route", "operation", "table"),
+    SQL_BUCKETS,
+)
+SQL_ROWS = Histogram(
+    "db_query_rows",
+    "Rows reported by the DB-API cursor (when known)",
+    ("engine", "route", "operation", "table"),
+    ROWS_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ("engine", "route"),
+    SQL_BUCKETS,
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_failures_total",
+    "Connection checkouts that raised (pool timeout, connect errors)",
+    ("engine", "route"),
+)
+POOL_SIZE = Gauge("db_pool_size", "Configured pool_size", ("engine",))
+POOL_MAX_OVERFLOW = Gauge(
+    "db_pool_max_overflow", "Configured max_overflow", ("engine",)
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently in use", ("engine",)
+)
+POOL_UTILIZATION = Gauge(
+    "db_pool_utilization",
+    "Checked-out connections / (pool_size + max_overflow)",
+    ("engine",),
+)
+
+METRICS = [
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    HTTP_IN_FLIGHT,
+    SQL_DURATION,
+    SQL_ROWS,
+    POOL_WAIT,
+    POOL_TIMEOUTS,
+    POOL_SIZE,
+    POOL_MAX_OVERFLOW,
+    POOL_CHECKED_OUT,
+    POOL_UTILIZATION,
+]
+
+_engines = {}
+
+
+def current_route() -> str:
+    """Rota da requisição em andamento ("background" fora de requisições)."""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # O FastAPI guarda a rota original do APIRouter (sem o prefixo de
+    # include_router, ex. "/api"); o caminho montado fica no contexto efetivo
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    return getattr(context, "path", None) or getattr(route, "path", None) or "unmatched"
+
+
+def timed_pool(pool_class):
+    """Subclasse do pool que mede a espera em cada checkout de conexão."""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            labels = (self.logging_name or "default", current_route())
+            try:
+                connection = super()._do_get()
+            except Exception:
+                POOL_TIMEOUTS.inc(*labels)
+                raise
+            POOL_WAIT.observe(*labels, value=time.perf_counter() - started)
+            return connection
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_engine(engine, name: str):
+    """Registra eventos de tempo/linhas das consultas de um engine síncrono."""
+    _engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        match = _TABLE.search(statement or "")
+        labels = (name, current_route(), operation, match.group(1) if match else "")
+        SQL_DURATION.observe(*labels, value=elapsed)
+        rowcount = getattr(cursor, "rowcount", -1)
+        if rowcount is not None and rowcount >= 0:
+            SQL_ROWS.observe(*labels, value=rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Consulta que falhou: descarta o início registrado em _before
+        conn = context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def _collect_pools():
+    for name, engine in _engines.items():
+        pool = engine.pool
+        size = pool.size() if hasattr(pool, "size") else 0
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        capacity = size + max(max_overflow, 0)
+        POOL_SIZE.set(name, value=size)
+        POOL_MAX_OVERFLOW.set(name, value=max_overflow)
+        POOL_CHECKED_OUT.set(name, value=checked_out)
+        POOL_UTILIZATION.set(
+            name, value=round(checked_out / capacity, 4) if capacity else 0
+        )
+
+
+def render() -> str:
+    _collect_pools()
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latência até o fim do corpo, status e requisições ativas."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = _request_scope.set(scope)
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(method)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method)
+            route = current_route()
+            HTTP_DURATION.observe(method, route, value=time.perf_counter() - started)
+            HTTP_REQUESTS.inc(method, route, str(status))
+            _request_scope.reset(token)
@@ -0,0 +1,29 @@
+import base64
+from datetime import datetime
+
+from fastapi import Query
+
+# Paginação por chave (keyset) em (timestamp, id): o cursor guarda a posição da
+# última linha entregue e a próxima página começa com uma busca no índice, sem
+# OFFSET; páginas profundas custam o mesmo que a primeira.
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+LIMIT_QUERY = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+CURSOR_QUERY = Query(None, max_length=128, description="next_cursor da página anterior")
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverso de encode_cursor; ValueError se o cursor for inválido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("invalid cursor") from e
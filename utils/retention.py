@@ -0,0 +1,166 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, text
+
+from database.migrations import partitioning
+from utils.stations import station_clause
+
+# Camadas de `readings`:
+# quente: leituras brutas dos últimos RETENTION_HOT_DAYS dias;
+# fria: agregados horários (`readings_hourly`), que já cobrem todo o histórico,
+# e opcionalmente arquivos Parquet com as leituras brutas (ARCHIVE_DIR).
+RETENTION_HOT_DAYS = int(os.getenv("RETENTION_HOT_DAYS", "365"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "")
+DELETE_BATCH_ROWS = 10000
+
+# As séries de 24h/15d/30d e as médias leem leituras brutas do último mês; a
+# compactação nunca avança sobre essa janela.
+MIN_HOT_DAYS = 31
+
+_WATERMARK = text(
+    "SELECT compacted_until FROM readings_retention WHERE id = 1"
+).columns(compacted_until=DateTime)
+
+_SET_WATERMARK = text(
+    """
+    INSERT INTO readings_retention (id, compacted_until) VALUES (1, :cutoff)
+    ON DUPLICATE KEY UPDATE
+        compacted_until = GREATEST(compacted_until, VALUES(compacted_until))
+    """
+)
+
+_COLD_SQL = """
+    SELECT bucket AS timestamp,
+           temp_sum / count AS temperature,
+           hum_sum / count AS humidity,
+           station_id
+    FROM readings_hourly
+    WHERE bucket >= :start AND bucket < :watermark{station}
+    ORDER BY bucket ASC
+"""
+
+_HOT_SQL = """
+    SELECT timestamp, temperature, humidity, station_id
+    FROM readings
+    WHERE timestamp >= :start{station}
+    ORDER BY timestamp ASC
+"""
+
+
+def _typed(template: str, clause: str):
+    return text(template.format(station=clause)).columns(timestamp=DateTime)
+
+
+def may_be_compacted(start: datetime) -> bool:
+    """False quando `start` é recente demais para ter sido compactado."""
+    return start < datetime.now() - timedelta(days=MIN_HOT_DAYS)
+
+
+def watermark(conn) -> datetime | None:
+    return conn.execute(_WATERMARK).scalar()
+
+
+def range_queries(start: datetime, station: str | None, compacted_until=None):
+    """Consultas (em ordem) que devolvem as leituras com timestamp >= start.
+
+    Antes de `compacted_until` as linhas vêm dos agregados horários (médias da
+    hora, com timestamp no início da hora); depois, das leituras brutas.
+    """
+    clause = station_clause(station)
+    params = {"start": start, "station": station}
+    if compacted_until is None or start >= compacted_until:
+        return [(_typed(_HOT_SQL, clause), params)]
+    cold_start = start.replace(minute=0, second=0, microsecond=0)
+    if cold_start < start:
+        cold_start += timedelta(hours=1)
+    return [
+        (
+            _typed(_COLD_SQL, clause),
+            {**params, "start": cold_start, "watermark": compacted_until},
+        ),
+        (_typed(_HOT_SQL, clause), {**params, "start": compacted_until}),
+    ]
+
+
+def _archive(conn, start: datetime | None, cutoff: datetime, archive_dir: str):
+    """Grava as leituras brutas de [start, cutoff) em um arquivo Parquet."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("ARCHIVE_DIR requires the pyarrow package") from e
+
+    os.makedirs(archive_dir, exist_ok=True)
+    first = start or conn.execute(text("SELECT MIN(timestamp) FROM readings")).scalar()
+    if first is None or first >= cutoff:
+        return None
+    path = os.path.join(
+        archive_dir, f"readings_{first:%Y%m%dT%H%M}_{cutoff:%Y%m%dT%H%M}.parquet"
+    )
+    result = conn.execution_options(stream_results=True, yield_per=50000).execute(
+        text(
+            """
+            SELECT id, timestamp, temperature, humidity, station_id
+            FROM readings WHERE timestamp < :cutoff ORDER BY timestamp ASC
+            """
+        ),
+        {"cutoff": cutoff},
+    )
+    writer, rows = None, 0
+    try:
+        for chunk in result.mappings().partitions():
+            table = pa.Table.from_pylist([dict(row) for row in chunk])
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path if rows else None
+
+
+def compact(engine, hot_days: int = RETENTION_HOT_DAYS, archive_dir: str = ""):
+    """Remove as leituras brutas fora da janela quente.
+
+    Os agregados horários/diários já contêm essas leituras (mantidos a cada
+    inserção). A marca d'água é gravada antes de apagar, para que as leituras
+    de intervalo passem a usar a camada fria antes de as linhas sumirem.
+    """
+    if hot_days < MIN_HOT_DAYS:
+        raise ValueError(f"hot window must be at least {MIN_HOT_DAYS} days")
+    cutoff = (datetime.now() - timedelta(days=hot_days)).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+    archive = None
+    with engine.begin() as conn:
+        previous = watermark(conn)
+        if previous is not None and previous >= cutoff:
+            # Nada novo a compactar; só termina uma remoção interrompida
+            cutoff = previous
+        else:
+            if archive_dir:
+                archive = _archive(conn, previous, cutoff, archive_dir)
+            conn.execute(_SET_WATERMARK, {"cutoff": cutoff})
+
+    # Partições inteiras antes do corte saem com DROP PARTITION; o resto em lotes
+    with engine.begin() as conn:
+        dropped = partitioning.drop_before(conn, cutoff.date())
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            count = conn.execute(
+                text("DELETE FROM readings WHERE timestamp < :cutoff LIMIT :batch"),
+                {"cutoff": cutoff, "batch": DELETE_BATCH_ROWS},
+            ).rowcount
+        deleted += count
+        if count < DELETE_BATCH_ROWS:
+            break
+    return {
+        "cutoff": cutoff,
+        "deleted": deleted,
+        "archive": archive,
+        "dropped": dropped,
+    }
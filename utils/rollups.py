@@ -0,0 +1,344 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from sqlalchemy import Date, text
+
+from database.models.entities.rollups import DailyRollup, HourlyRollup
+from utils import histograms
+from utils.stations import DEFAULT_STATION, station_clause
+from utils.upsert import upsert
+
+# Agregados por hora e por dia mantidos a cada inserção em `readings`.
+# Cada bucket guarda count/sum/min/max, o que permite recompor AVG/MIN/MAX/COUNT
+# de qualquer janela sem varrer as leituras brutas.
+
+# Como cada coluna do bucket absorve as leituras novas (ver utils/upsert)
+_MERGE = {
+    "add": ("count", "temp_sum", "hum_sum"),
+    "least": ("temp_min", "hum_min"),
+    "greatest": ("temp_max", "hum_max"),
+}
+
+# Partes da janela: leituras brutas até a primeira hora cheia, buckets horários
+# até o primeiro dia cheio e buckets diários daí em diante.
+_WINDOW_PARTS = """
+    SELECT
+        local_date AS day,
+        COUNT(*) AS cnt,
+        SUM(temperature) AS temp_sum,
+        MIN(temperature) AS temp_min,
+        MAX(temperature) AS temp_max,
+        SUM(humidity) AS hum_sum,
+        MIN(humidity) AS hum_min,
+        MAX(humidity) AS hum_max
+    FROM readings
+    WHERE timestamp >= :start AND timestamp < :hour_edge{station}
+    GROUP BY local_date
+    UNION ALL
+    SELECT
+        DATE(bucket) AS day,
+        SUM(count) AS cnt,
+        SUM(temp_sum) AS temp_sum,
+        MIN(temp_min) AS temp_min,
+        MAX(temp_max) AS temp_max,
+        SUM(hum_sum) AS hum_sum,
+        MIN(hum_min) AS hum_min,
+        MAX(hum_max) AS hum_max
+    FROM readings_hourly
+    WHERE bucket >= :hour_edge AND bucket < :day_edge{station}
+    GROUP BY DATE(bucket)
+    UNION ALL
+    SELECT day, count, temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max
+    FROM readings_daily
+    WHERE day >= :day_edge_date{station}
+"""
+
+_DAILY_STATS = """
+    SELECT
+        day AS date,
+        SUM(cnt) AS count,
+        SUM(temp_sum) / SUM(cnt) AS temp_avg,
+        MIN(temp_min) AS temp_min,
+        MAX(temp_max) AS temp_max,
+        SUM(hum_sum) / SUM(cnt) AS hum_avg,
+        MIN(hum_min) AS hum_min,
+        MAX(hum_max) AS hum_max
+    FROM ({parts}) AS parts
+    GROUP BY day
+    ORDER BY day ASC
+"""
+
+_DAY_STATS = """
+    SELECT
+        COALESCE(SUM(count), 0) AS count,
+        SUM(temp_sum) / SUM(count) AS temp_avg,
+        MIN(temp_min) AS temp_min,
+        MAX(temp_max) AS temp_max,
+        SUM(hum_sum) / SUM(count) AS hum_avg,
+        MIN(hum_min) AS hum_min,
+        MAX(hum_max) AS hum_max
+    FROM readings_daily
+    WHERE day = :day{station}
+"""
+
+_DAYS_STATS = """
+    SELECT
+        day AS date,
+        SUM(count) AS count,
+        SUM(temp_sum) / SUM(count) AS temp_avg,
+        MIN(temp_min) AS temp_min,
+        MAX(temp_max) AS temp_max,
+        SUM(hum_sum) / SUM(count) AS hum_avg,
+        MIN(hum_min) AS hum_min,
+        MAX(hum_max) AS hum_max
+    FROM readings_daily
+    WHERE day >= :start AND day <= :end{station}
+    GROUP BY day
+    ORDER BY day ASC
+"""
+
+
+# Várias janelas (timestamp >= start_i) em uma só consulta: as partes de cada
+# janela (brutas até a hora cheia, horários até o dia cheio, diários depois) são
+# lidas juntas e cada linha é atribuída às janelas por agregação condicional.
+_MULTI_PARTS = """
+    SELECT 'r' AS kind, timestamp AS ts, 1 AS cnt,
+           temperature AS temp_sum, temperature AS temp_min, temperature AS temp_max,
+           humidity AS hum_sum, humidity AS hum_min, humidity AS hum_max
+    FROM readings
+    WHERE ({raw}){station}
+    UNION ALL
+    SELECT 'h', bucket, count, temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max
+    FROM readings_hourly
+    WHERE ({hourly}){station}
+    UNION ALL
+    SELECT 'd', day, count, temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max
+    FROM readings_daily
+    WHERE day >= :first_day{station}
+"""
+
+_MULTI_COLUMNS = """
+        COALESCE(SUM(CASE WHEN {c} THEN cnt END), 0) AS count_{i},
+        SUM(CASE WHEN {c} THEN temp_sum END)
+            / SUM(CASE WHEN {c} THEN cnt END) AS temp_avg_{i},
+        MIN(CASE WHEN {c} THEN temp_min END) AS temp_min_{i},
+        MAX(CASE WHEN {c} THEN temp_max END) AS temp_max_{i},
+        SUM(CASE WHEN {c} THEN hum_sum END)
+            / SUM(CASE WHEN {c} THEN cnt END) AS hum_avg_{i},
+        MIN(CASE WHEN {c} THEN hum_min END) AS hum_min_{i},
+        MAX(CASE WHEN {c} THEN hum_max END) AS hum_max_{i}"""
+
+STAT_COLUMNS = (
+    "count",
+    "temp_avg",
+    "temp_min",
+    "temp_max",
+    "hum_avg",
+    "hum_min",
+    "hum_max",
+)
+
+
+@lru_cache(maxsize=None)
+def _windows_sql(windows: int, per_station: bool):
+    clause = station_clause(DEFAULT_STATION if per_station else None)
+    indexes = range(windows)
+    raw = " OR ".join(f"(timestamp >= :s{i} AND timestamp < :h{i})" for i in indexes)
+    hourly = " OR ".join(f"(bucket >= :h{i} AND bucket < :d{i})" for i in indexes)
+    columns = ",".join(
+        _MULTI_COLUMNS.format(
+            i=i,
+            c=(
+                f"((kind = 'r' AND ts >= :s{i} AND ts < :h{i})"
+                f" OR (kind = 'h' AND ts >= :h{i} AND ts < :d{i})"
+                f" OR (kind = 'd' AND ts >= :dd{i}))"
+            ),
+        )
+        for i in indexes
+    )
+    parts = _MULTI_PARTS.format(raw=raw, hourly=hourly, station=clause)
+    return text(f"SELECT {columns}\n    FROM ({parts}) AS parts")
+
+
+@lru_cache(maxsize=None)
+def _sql(template: str, per_station: bool):
+    """Compila o template com ou sem o filtro por estação."""
+    clause = station_clause(DEFAULT_STATION if per_station else None)
+    query = text(
+        template.format(station=clause, parts=_WINDOW_PARTS.format(station=clause))
+    )
+    # Coluna de data tipada: drivers como o aiosqlite a devolvem como texto
+    return query.columns(date=Date) if "AS date" in template else query
+
+
+def _field(reading, name, default=None):
+    if isinstance(reading, dict):
+        return reading.get(name, default)
+    return getattr(reading, name, default)
+
+
+def _merge(buckets: dict, key, temperature: float, humidity: float):
+    agg = buckets.get(key)
+    if agg is None:
+        buckets[key] = {
+            "count": 1,
+            "temp_sum": temperature,
+            "temp_min": temperature,
+            "temp_max": temperature,
+            "hum_sum": humidity,
+            "hum_min": humidity,
+            "hum_max": humidity,
+        }
+        return
+    agg["count"] += 1
+    agg["temp_sum"] += temperature
+    agg["temp_min"] = min(agg["temp_min"], temperature)
+    agg["temp_max"] = max(agg["temp_max"], temperature)
+    agg["hum_sum"] += humidity
+    agg["hum_min"] = min(agg["hum_min"], humidity)
+    agg["hum_max"] = max(agg["hum_max"], humidity)
+
+
+def apply_readings(session, readings):
+    """Incorpora leituras recém-inseridas nos agregados e histogramas diários.
+
+    Deve rodar na mesma transação do INSERT em `readings` para que os
+    agregados nunca divirjam das leituras brutas.
+    """
+    hourly, daily, bins = {}, {}, Counter()
+    for reading in readings:
+        station = _field(reading, "station_id") or DEFAULT_STATION
+        ts = _field(reading, "timestamp")
+        temperature = float(_field(reading, "temperature"))
+        humidity = float(_field(reading, "humidity"))
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        _merge(hourly, (station, hour), temperature, humidity)
+        _merge(daily, (station, ts.date()), temperature, humidity)
+        histograms.count(bins, station, ts.date(), temperature, humidity)
+
+    if not hourly:
+        return
+    dialect = session.get_bind().dialect.name
+    session.execute(
+        upsert(dialect, HourlyRollup.__table__, **_MERGE),
+        [{"station_id": k[0], "bucket": k[1], **v} for k, v in hourly.items()],
+    )
+    session.execute(
+        upsert(dialect, DailyRollup.__table__, **_MERGE),
+        [{"station_id": k[0], "day": k[1], **v} for k, v in daily.items()],
+    )
+    histograms.store(session, bins)
+
+
+def _window_params(start: datetime, station: str | None) -> dict:
+    hour_edge = start.replace(minute=0, second=0, microsecond=0)
+    if hour_edge < start:
+        hour_edge += timedelta(hours=1)
+    day_edge = datetime.combine(hour_edge.date(), time.min)
+    if day_edge < hour_edge:
+        day_edge += timedelta(days=1)
+    return {
+        "start": start,
+        "hour_edge": hour_edge,
+        "day_edge": day_edge,
+        "day_edge_date": day_edge.date(),
+        "station": station,
+    }
+
+
+def windows_stats(session, starts: list[datetime], station: str | None = None):
+    """AVG/MIN/MAX/COUNT das leituras com timestamp >= start, para cada início.
+
+    Todas as janelas saem de uma única consulta, na ordem de `starts`.
+    """
+    params = {"station": station}
+    for i, start in enumerate(starts):
+        window = _window_params(start, station)
+        params[f"s{i}"] = window["start"]
+        params[f"h{i}"] = window["hour_edge"]
+        params[f"d{i}"] = window["day_edge"]
+        params[f"dd{i}"] = window["day_edge_date"]
+    params["first_day"] = min(params[f"dd{i}"] for i in range(len(starts)))
+    query = _windows_sql(len(starts), bool(station))
+    row = session.execute(query, params).mappings().first()
+    return [
+        {name: row[f"{name}_{i}"] for name in STAT_COLUMNS} for i in range(len(starts))
+    ]
+
+
+def daily_stats(session, start: datetime, station: str | None = None):
+    """Estatísticas das leituras com timestamp >= start, por DATE(timestamp)."""
+    query = _sql(_DAILY_STATS, bool(station))
+    return session.execute(query, _window_params(start, station)).mappings().all()
+
+
+def day_stats(session, day: date, station: str | None = None):
+    """Estatísticas de um dia completo, lidas direto do agregado diário."""
+    query = _sql(_DAY_STATS, bool(station))
+    return session.execute(query, {"day": day, "station": station}).mappings().first()
+
+
+def days_stats(session, start: date, end: date, station: str | None = None):
+    """Estatísticas dos dias completos entre start e end (inclusive)."""
+    query = _sql(_DAYS_STATS, bool(station))
+    params = {"start": start, "end": end, "station": station}
+    return session.execute(query, params).mappings().all()
+
+
+def rebuild(conn, since: datetime | None = None):
+    """Recalcula os agregados a partir das leituras brutas.
+
+    Com `since` (limite da compactação), os buckets horários anteriores são
+    mantidos: as leituras brutas deles já foram removidas.
+    """
+    since = since or datetime.min
+    conn.execute(
+        text("DELETE FROM readings_hourly WHERE bucket >= :since"), {"since": since}
+    )
+    conn.execute(text("DELETE FROM readings_daily"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO readings_hourly
+                (station_id, bucket, count,
+                 temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max)
+            SELECT
+                station_id,
+                DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00') AS bucket,
+                COUNT(*),
+                SUM(temperature),
+                MIN(temperature),
+                MAX(temperature),
+                SUM(humidity),
+                MIN(humidity),
+                MAX(humidity)
+            FROM readings
+            WHERE timestamp >= :since
+            GROUP BY station_id, bucket
+            """
+        ),
+        {"since": since},
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO readings_daily
+                (station_id, day, count,
+                 temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max)
+            SELECT
+                station_id,
+                DATE(bucket),
+                SUM(count),
+                SUM(temp_sum),
+                MIN(temp_min),
+                MAX(temp_max),
+                SUM(hum_sum),
+                MIN(hum_min),
+                MAX(hum_max)
+            FROM readings_hourly
+            GROUP BY station_id, DATE(bucket)
+            """
+        )
+    )
+    histograms.rebuild(conn, since)
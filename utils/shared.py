@@ -0,0 +1,336 @@
+import asyncio
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, text
+
+from database.configs.database import SessionLocal
+from utils.cache import response_cache
+from utils.hub import reading_hub
+from utils.latest import latest_reading
+from utils.stations import DEFAULT_STATION
+
+# Estado ao vivo compartilhado entre workers (uvicorn --workers N) sem serviço
+# externo: um arquivo mapeado em memória (de preferência em /dev/shm) com um
+# anel das leituras recentes. Quem grava uma leitura a acrescenta no anel depois
+# do commit; cada worker acompanha o anel e aplica as leituras dos outros à
+# própria memória (última leitura, cache de respostas, clientes SSE).
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+SHARED_RING_CAPACITY = int(os.getenv("SHARED_RING_CAPACITY", "32768"))
+SHARED_POLL_MS = int(os.getenv("SHARED_POLL_MS", "250"))
+
+# Janela carregada do banco quando o anel é criado
+SEED_HOURS = 24
+
+_MAGIC = b"MTRING01"
+# magic, capacidade, leituras já escritas, completo desde (µs), dono, semeado
+_HEADER = struct.Struct("<8sQQqQQ")
+_HEADER_SIZE = 64
+_WRITE_SEQ = 16
+_COMPLETE_SINCE = 24
+_SEEDED = 40
+# seq, timestamp (µs), temperatura, umidade, pid do autor, estação, seq de novo
+_SLOT = struct.Struct("<QqddI4x64sQ")
+_SEQ = struct.Struct("<Q")
+_INT = struct.Struct("<q")
+_NOT_COVERED = 2**63 - 1
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_SEED_QUERY = text(
+    """
+    SELECT timestamp, temperature, humidity, station_id
+    FROM readings
+    WHERE timestamp >= :start
+    ORDER BY timestamp DESC
+    LIMIT :limit
+    """
+).columns(timestamp=DateTime)
+
+
+def _to_us(timestamp: datetime) -> int:
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def _from_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _field(reading, name):
+    if hasattr(reading, "keys"):
+        return reading.get(name)
+    return getattr(reading, name, None)
+
+
+class SharedRing:
+    """Anel de leituras recentes em memória compartilhada entre processos.
+
+    Escritas são serializadas com flock; leituras não bloqueiam: cada posição
+    traz o número de sequência no início e no fim (seqlock) e uma cópia com os
+    dois diferentes é descartada. `complete_since` marca a partir de quando o
+    anel tem todas as leituras: sobe quando uma posição é reaproveitada.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.size = _HEADER_SIZE + capacity * _SLOT.size
+        self._fd = None
+        self._mm = None
+        self._pid = os.getpid()
+        self._write_lock = threading.Lock()
+        # Espelho local, ordenado por (timestamp, estação), das leituras do anel
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._keys: list[tuple[int, str]] = []
+        self._values: list[tuple[float, float]] = []
+
+    def open(self):
+        import fcntl  # só Unix; importado apenas com o anel habilitado
+
+        self._flock = fcntl.flock
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size != self.size:
+                os.ftruncate(self._fd, self.size)
+            self._mm = mmap.mmap(self._fd, self.size)
+            magic, capacity, _, _, owner, _ = _HEADER.unpack_from(self._mm, 0)
+            # Todos os workers de uma implantação têm o mesmo processo pai;
+            # um anel de outro dono sobrou de uma execução anterior
+            if magic != _MAGIC or capacity != self.capacity or owner != os.getppid():
+                self._mm[:] = bytes(self.size)
+                _HEADER.pack_into(
+                    self._mm, 0, _MAGIC, self.capacity, 0, _NOT_COVERED, os.getppid(), 0
+                )
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @contextmanager
+    def _locked(self):
+        with self._write_lock:
+            self._flock(self._fd, 2)  # LOCK_EX
+            try:
+                yield
+            finally:
+                self._flock(self._fd, 8)  # LOCK_UN
+
+    def _write_seq(self) -> int:
+        return _SEQ.unpack_from(self._mm, _WRITE_SEQ)[0]
+
+    def _complete_since(self) -> int:
+        return _INT.unpack_from(self._mm, _COMPLETE_SINCE)[0]
+
+    def _offset(self, seq: int) -> int:
+        return _HEADER_SIZE + (seq % self.capacity) * _SLOT.size
+
+    @property
+    def seeded(self) -> bool:
+        return _SEQ.unpack_from(self._mm, _SEEDED)[0] == 1
+
+    def append(self, readings):
+        """Acrescenta leituras já gravadas no banco (chamar depois do commit)."""
+        records = []
+        for reading in readings:
+            station = _field(reading, "station_id") or DEFAULT_STATION
+            records.append(
+                (
+                    _to_us(_field(reading, "timestamp")),
+                    float(_field(reading, "temperature")),
+                    float(_field(reading, "humidity")),
+                    self._pid,
+                    station.encode(),
+                )
+            )
+        if records:
+            with self._locked():
+                self._append(records)
+
+    def _append(self, records) -> int | None:
+        """Escreve os registros; devolve o timestamp mais novo que saiu do anel."""
+        first = self._write_seq()
+        last = first + len(records)
+        kept = records[-self.capacity :]
+        # Sobe o limite antes de sobrescrever: um leitor que copiou uma posição
+        # reaproveitada vê o limite novo ao conferir a cobertura
+        evicted = [record[0] for record in records[: -self.capacity]]
+        for seq in range(max(last - len(kept), self.capacity), last):
+            evicted.append(_INT.unpack_from(self._mm, self._offset(seq) + 8)[0])
+        newest_evicted = max(evicted, default=None)
+        if newest_evicted is not None:
+            complete_since = max(self._complete_since(), newest_evicted)
+            _INT.pack_into(self._mm, _COMPLETE_SINCE, complete_since)
+
+        for seq, record in zip(range(last - len(kept), last), kept):
+            offset = self._offset(seq)
+            _SEQ.pack_into(self._mm, offset, 0)
+            _SLOT.pack_into(self._mm, offset, 0, *record, seq + 1)
+            _SEQ.pack_into(self._mm, offset, seq + 1)
+        _SEQ.pack_into(self._mm, _WRITE_SEQ, last)
+        return newest_evicted
+
+    def seed(self, load):
+        """Preenche um anel novo com `load(limit) -> (leituras, completo desde)`.
+
+        Só um worker semeia; os demais encontram o anel já marcado.
+        """
+        with self._locked():
+            if self.seeded:
+                return
+            rows, since = load(self.capacity)
+            records = [
+                (
+                    _to_us(row["timestamp"]),
+                    float(row["temperature"]),
+                    float(row["humidity"]),
+                    0,
+                    (row["station_id"] or DEFAULT_STATION).encode(),
+                )
+                for row in rows
+            ]
+            evicted = self._append(records)
+            complete_since = _to_us(since)
+            if evicted is not None:
+                complete_since = max(complete_since, evicted)
+            _INT.pack_into(self._mm, _COMPLETE_SINCE, complete_since)
+            _SEQ.pack_into(self._mm, _SEEDED, 1)
+
+    def poll(self) -> list[dict]:
+        """Traz para o espelho local as leituras novas do anel.
+
+        Devolve as que foram escritas por outros processos.
+        """
+        with self._lock:
+            written = self._write_seq()
+            if written == self._seen:
+                return []
+            if written < self._seen or written - self._seen > self.capacity:
+                # Anel recriado ou worker atrasado demais: refaz o espelho
+                self._keys, self._values = [], []
+                self._seen = max(0, written - self.capacity)
+
+            foreign = []
+            for seq in range(self._seen, written):
+                begin, ts, temperature, humidity, pid, station, end = _SLOT.unpack_from(
+                    self._mm, self._offset(seq)
+                )
+                if begin != seq + 1 or end != seq + 1:
+                    continue  # já reaproveitada: fica abaixo de complete_since
+                key = (ts, station.rstrip(b"\0").decode())
+                index = bisect_left(self._keys, key)
+                if index < len(self._keys) and self._keys[index] == key:
+                    continue  # semeada e acrescentada por quem a gravou
+                self._keys.insert(index, key)
+                self._values.insert(index, (temperature, humidity))
+                # pid 0: carregada do banco na semeadura, não é leitura nova
+                if pid not in (0, self._pid):
+                    foreign.append(self._row(key, (temperature, humidity)))
+            self._seen = written
+
+            # O que está abaixo do limite nunca é servido
+            cut = bisect_left(self._keys, (self._complete_since() + 1, ""))
+            del self._keys[:cut]
+            del self._values[:cut]
+            return foreign
+
+    @staticmethod
+    def _row(key, value) -> dict:
+        return {
+            "timestamp": _from_us(key[0]),
+            "temperature": value[0],
+            "humidity": value[1],
+            "station_id": key[1],
+        }
+
+    def window(self, start: datetime, station: str | None = None):
+        """Leituras com timestamp >= start em ordem, ou None se o anel não cobre."""
+        start_us = _to_us(start)
+        with self._lock:
+            if start_us <= self._complete_since():
+                return None
+            index = bisect_left(self._keys, (start_us, ""))
+            # Mesmas colunas da consulta da janela no banco
+            return [
+                {
+                    "temperature": value[0],
+                    "humidity": value[1],
+                    "timestamp": _from_us(key[0]),
+                }
+                for key, value in zip(self._keys[index:], self._values[index:])
+                if station is None or key[1] == station
+            ]
+
+    def stats(self) -> dict:
+        complete_since = self._complete_since()
+        return {
+            "capacity": self.capacity,
+            "written": self._write_seq(),
+            "seen": self._seen,
+            "mirrored": len(self._keys),
+            "complete_since": (
+                None if complete_since == _NOT_COVERED else _from_us(complete_since)
+            ),
+        }
+
+
+shared_ring = (
+    SharedRing(SHARED_STATE_PATH, SHARED_RING_CAPACITY) if SHARED_STATE_PATH else None
+)
+
+
+def _load_recent(limit: int):
+    start = datetime.now() - timedelta(hours=SEED_HOURS)
+    session = SessionLocal()
+    try:
+        params = {"start": start, "limit": limit}
+        rows = session.execute(_SEED_QUERY, params).mappings().all()
+    finally:
+        session.close()
+    rows = rows[::-1]
+    # Cheio: só está completo depois da leitura mais antiga que coube
+    since = rows[0]["timestamp"] if len(rows) == limit else start - _MICROSECOND
+    return rows, since
+
+
+def seed():
+    shared_ring.seed(_load_recent)
+
+
+def sync():
+    """Aplica as leituras gravadas por outros workers ao estado deste processo."""
+    if shared_ring is None:
+        return
+    rows = shared_ring.poll()
+    if rows:
+        latest_reading.offer(rows)
+        response_cache.bump(r["timestamp"] for r in rows)
+        reading_hub.publish_newest(rows)
+
+
+def window(start: datetime, station: str | None = None):
+    """Janela servida da memória compartilhada; None se indisponível."""
+    if shared_ring is None:
+        return None
+    sync()
+    return shared_ring.window(start, station)
+
+
+async def follow():
+    """Acompanha o anel enquanto a aplicação roda (tarefa do lifespan)."""
+    while True:
+        try:
+            sync()
+        except Exception as e:
+            print(f"Error following shared ring: {e}")
+        await asyncio.sleep(SHARED_POLL_MS / 1000)
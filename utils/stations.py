@@ -0,0 +1,14 @@
+from fastapi import Query
+
+# Estação usada pelas leituras antigas e por dispositivos que não se identificam
+DEFAULT_STATION = "default"
+STATION_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
+
+STATION_QUERY = Query(
+    None, pattern=STATION_PATTERN, description="Filtra por estação (station_id)"
+)
+
+
+def station_clause(station: str | None, column: str = "station_id") -> str:
+    """Trecho SQL (parâmetro :station) que restringe a consulta a uma estação."""
+    return f" AND {column} = :station" if station else ""
@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# INSERT ... ON CONFLICT que soma contagens e mantém mínimos/máximos, no
+# dialeto da conexão. Os agregados e histogramas usam a mesma forma de
+# atualização: colunas somadas, colunas com o menor e com o maior valor.
+
+_INSERTS = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+@lru_cache(maxsize=None)
+def upsert(dialect: str, table, add=(), least=(), greatest=()):
+    """Instrução de upsert para `table` (usar com uma lista de linhas)."""
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        raise RuntimeError(f"Rollup upserts are not supported on {dialect}")
+    stmt = insert(table)
+    if dialect in ("mysql", "mariadb"):
+        new = stmt.inserted
+    else:
+        new = stmt.excluded
+    # SQLite não tem LEAST/GREATEST; MIN/MAX com vários argumentos são escalares
+    lower, upper = (
+        (func.min, func.max) if dialect == "sqlite" else (func.least, func.greatest)
+    )
+    values = {c: table.c[c] + new[c] for c in add}
+    values |= {c: lower(table.c[c], new[c]) for c in least}
+    values |= {c: upper(table.c[c], new[c]) for c in greatest}
+    if dialect in ("mysql", "mariadb"):
+        return stmt.on_duplicate_key_update(values)
+    keys = [c.name for c in table.primary_key.columns]
+    return stmt.on_conflict_do_update(index_elements=keys, set_=values)